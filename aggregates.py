@@ -0,0 +1,90 @@
+import pandas as pd
+import numpy as np
+from loader import ensure_time_features
+
+# (scheduled time column, delay column, movement label) for each side of a flight
+MOVEMENT_COLUMNS = [
+    ('Scheduled Departure (Local)', 'Departure Delay (min)', 'Departure'),
+    ('Scheduled Arrival (Local)', 'Arrival Delay (min)', 'Arrival')
+]
+
+
+def melt_movements(df):
+    """
+    Stack the departure and arrival columns into one long (time, delay) frame.
+
+    Each output row is one scheduled movement with its own delay, keyed by
+    Airport, Carrier and Flight Type of the source row.
+    """
+    df = ensure_time_features(df)
+    parts = []
+    for time_col, delay_col, movement in MOVEMENT_COLUMNS:
+        has_time = df[time_col].notna().to_numpy()
+        part = df.loc[has_time, ['Airport', 'Carrier', 'Flight Type']].copy()
+        part['Movement'] = movement
+        part['Scheduled'] = df.loc[has_time, time_col]
+        part['Delay'] = df.loc[has_time, delay_col]
+        parts.append(part)
+    melted = pd.concat(parts, ignore_index=True)
+    for col in ['Airport', 'Carrier', 'Flight Type', 'Movement']:
+        melted[col] = melted[col].astype('category')
+    return melted
+
+
+def time_buckets(scheduled, bucket_minutes=60):
+    """Bucket index within the day (0..1440/bucket_minutes-1) for each timestamp"""
+    minute_of_day = scheduled.dt.hour * 60 + scheduled.dt.minute
+    return (minute_of_day // bucket_minutes).astype('int16')
+
+
+def delay_heatmap(df, bucket_minutes=60, by=('Airport', 'Flight Type')):
+    """
+    Delay statistics per time-of-day bucket in a single groupby.
+
+    Returns a frame indexed by `by` + 'Bucket' with Count/Mean/Median/P90
+    columns; with the default 60-minute buckets 'Bucket' is the hour.
+    """
+    melted = melt_movements(df).dropna(subset=['Delay'])
+    melted['Bucket'] = time_buckets(melted['Scheduled'], bucket_minutes)
+
+    grouped = melted.groupby(list(by) + ['Bucket'], observed=True)['Delay']
+    stats = grouped.agg(['count', 'mean', 'median'])
+    stats['p90'] = grouped.quantile(0.9)
+    stats.columns = ['Count', 'Mean', 'Median', 'P90']
+    return stats
+
+
+def heatmap_matrix(df, airports, stat='Mean', bucket_minutes=60):
+    """Airport x bucket matrix of one delay statistic, zero where a bucket is empty"""
+    stats = delay_heatmap(df, bucket_minutes, by=('Airport',))
+    n_buckets = 24 * 60 // bucket_minutes
+    matrix = stats[stat].unstack('Bucket').reindex(index=airports, columns=np.arange(n_buckets))
+    return matrix.fillna(0)
+
+
+def carrier_kpis(df, by=('Airport', 'Carrier', 'Flight Type')):
+    """
+    Carrier-level KPIs for every carrier in one groupby.
+
+    Uses each movement's own delay: flight count, mean/median/p95 delay,
+    on-time rate (<=15 min) and severe-delay rate (>60 min), rates in percent
+    of flights with a known delay.
+    """
+    df = ensure_time_features(df)
+    delay = df['Delay (min)']
+    known = delay.notna()
+    frame = df[list(by)].copy()
+    frame['Delay'] = delay
+    frame['On_Time'] = (delay <= 15).where(known) * 100
+    frame['Severe'] = (delay > 60).where(known) * 100
+
+    grouped = frame.groupby(list(by), observed=True)
+    kpis = grouped.agg(
+        Flights=('Delay', 'size'),
+        Mean_Delay=('Delay', 'mean'),
+        Median_Delay=('Delay', 'median'),
+        On_Time_Rate=('On_Time', 'mean'),
+        Severe_Delay_Rate=('Severe', 'mean')
+    )
+    kpis.insert(3, 'P95_Delay', grouped['Delay'].quantile(0.95))
+    return kpis
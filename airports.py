@@ -0,0 +1,42 @@
+import json
+import os
+
+# Airport registry (IATA code -> ICAO, names, timezone, runway capacity, data file, plot colors).
+# Adding an airport means adding one entry to airports.json.
+REGISTRY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'airports.json')
+
+
+def load_registry(path=REGISTRY_PATH):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+REGISTRY = load_registry()
+
+
+def airport_codes():
+    """Every registered airport, in registry order"""
+    return list(REGISTRY)
+
+
+def available_airports(required=True):
+    """
+    Registered airports whose data file exists.
+
+    Raises FileNotFoundError naming the missing files when no registered
+    airport has data, unless required is False (then returns []).
+    """
+    codes = [code for code, info in REGISTRY.items() if os.path.exists(info['data'])]
+    if not codes and required:
+        missing = ', '.join(info['data'] for info in REGISTRY.values())
+        raise FileNotFoundError(f"no airport data found; missing {missing} (relative to {os.getcwd()}, registered in airports.json)")
+    return codes
+
+
+def airport_label(code):
+    return REGISTRY[code]['label']
+
+
+def airport_slug(code):
+    """File-name form of the label, e.g. 'bangalore'"""
+    return REGISTRY[code]['label'].lower().replace(' ', '_')
@@ -0,0 +1,184 @@
+import argparse
+import io
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from airports import REGISTRY, available_airports, airport_label
+from loader import CSV_DTYPES, parse_flights, combine, load_combined
+
+BENCHMARK_SIZES = [10_000, 100_000, 1_000_000]
+RESULTS_PATH = 'benchmark_results.json'
+ROWS_PER_DAY = 2000     # synthetic movements per airport-day, roughly DEL's volume
+START_DATE = '2025-08-16'
+
+# Fallback mix when no real data is available to sample from (carrier -> (IATA prefix, share))
+DEFAULT_CARRIERS = {
+    'IndiGo': ('6E', 0.45),
+    'Air India': ('AI', 0.26),
+    'Air India Express': ('IX', 0.11),
+    'SpiceJet': ('SG', 0.06),
+    'Akasa Air': ('QP', 0.06),
+    'Alliance Air': ('9I', 0.03),
+    'Emirates': ('EK', 0.03)
+}
+
+
+def _default_template(rng, n):
+    """Synthetic (carrier, flight number, hour, delay) pools from built-in shares"""
+    names = list(DEFAULT_CARRIERS)
+    shares = np.array([share for _, share in DEFAULT_CARRIERS.values()])
+    carriers = rng.choice(len(names), size=n, p=shares / shares.sum())
+    numbers = rng.integers(100, 9999, size=n)
+    flight_numbers = [f'{DEFAULT_CARRIERS[names[c]][0]} {num}' for c, num in zip(carriers, numbers)]
+    # Mostly on time with a long late tail, like the real CSVs
+    delays = np.where(rng.random(n) < 0.85, np.round(rng.normal(-2, 8, n)), np.round(rng.exponential(45, n)))
+    hours = rng.choice(24, size=n, p=np.r_[np.full(6, 0.5), np.ones(18)] / 21)
+    return pd.DataFrame({
+        'Carrier': np.array(names)[carriers],
+        'Flight Number': flight_numbers,
+        'Hour': hours,
+        'Delay (min)': delays
+    })
+
+
+def synthetic_flights(n_rows, airports=None, seed=0, template=None):
+    """
+    Synthetic flights in the airport CSV schema, split across airports.
+
+    Carrier/flight-number pairs, hour of day and delays are bootstrapped
+    from `template` (the real flights by default, built-in shares when no
+    data is available), so the carrier mix and delay distribution match.
+    Timestamps are '+05:30' strings; each row carries one movement, with
+    only the departure or arrival columns filled, as in the real data.
+    Returns {airport: frame with exactly the CSV columns}.
+    """
+    rng = np.random.default_rng(seed)
+    with_data = available_airports(required=False)
+    airports = airports or with_data or list(REGISTRY)
+    if template is None:
+        template = load_combined() if with_data else _default_template(rng, 5000)
+    template = template[template['Delay (min)'].notna() & template['Hour'].notna()]
+
+    picks = rng.integers(len(template), size=n_rows)
+    delay_picks = rng.integers(len(template), size=n_rows)
+    carrier = template['Carrier'].astype(str).to_numpy()[picks]
+    flight_number = template['Flight Number'].astype(str).to_numpy()[picks]
+    hour = template['Hour'].to_numpy(dtype=np.int64)[picks]
+    delay = template['Delay (min)'].to_numpy(dtype=float)[delay_picks]
+
+    airport = rng.integers(len(airports), size=n_rows)
+    n_days = max(int(np.ceil(n_rows / len(airports) / ROWS_PER_DAY)), 1)
+    scheduled = (pd.Timestamp(START_DATE)
+                 + pd.to_timedelta(rng.integers(n_days, size=n_rows), unit='D')
+                 + pd.to_timedelta(hour * 60 + rng.integers(60, size=n_rows), unit='min'))
+    revised = scheduled + pd.to_timedelta(delay, unit='min')
+    scheduled_text = scheduled.strftime('%Y-%m-%d %H:%M') + '+05:30'
+    revised_text = revised.strftime('%Y-%m-%d %H:%M') + '+05:30'
+
+    is_departure = rng.random(n_rows) < 0.5
+    frame = pd.DataFrame({
+        'Airport Name': np.array([airport_label(a) for a in airports])[airport],
+        'Flight Type': np.where(is_departure, 'Departure', 'Arrival'),
+        'Carrier': carrier,
+        'Flight Number': flight_number,
+        'Scheduled Departure (Local)': np.where(is_departure, scheduled_text, None),
+        'Revised Departure (Local)': np.where(is_departure, revised_text, None),
+        'Departure Delay (min)': np.where(is_departure, delay, np.nan),
+        'Scheduled Arrival (Local)': np.where(is_departure, None, scheduled_text),
+        'Revised Arrival (Local)': np.where(is_departure, None, revised_text),
+        'Arrival Delay (min)': np.where(is_departure, np.nan, delay)
+    })[list(CSV_DTYPES)]
+    return {code: frame[airport == i].reset_index(drop=True) for i, code in enumerate(airports)}
+
+
+def measure(fn, memory=True):
+    """Run fn twice: once for wall time, once under tracemalloc for peak memory. Returns (result, wall_s, peak_mb)"""
+    with redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = fn()
+        wall = time.perf_counter() - start
+
+        peak = None
+        if memory:
+            tracemalloc.start()
+            fn()
+            peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            tracemalloc.stop()
+    return result, wall, peak
+
+
+def benchmark_size(n_rows, seed=0, memory=True):
+    """Time every pipeline stage on n_rows synthetic flights; one record per stage"""
+    # Analysis modules are imported here so the generator stays usable on its own
+    import vis
+    from eval import calculate_airport_metrics
+    from stats import identify_optimal_slots, identify_busiest_slots, identify_high_impact_flights
+
+    raw = synthetic_flights(n_rows, seed=seed)
+    records = []
+
+    def record(stage, fn):
+        result, wall, peak = measure(fn, memory)
+        records.append({'stage': stage, 'rows': n_rows, 'wall_s': round(wall, 4),
+                        'peak_mb': None if peak is None else round(peak, 2)})
+        print(f"   {stage:<50} {wall:8.3f}s" + ('' if peak is None else f" {peak:9.1f} MB"))
+        return result
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {}
+        for airport, frame in raw.items():
+            paths[airport] = os.path.join(tmp, f'{airport}.csv')
+            frame.to_csv(paths[airport], index=False)
+        frames = record('parse_flights', lambda: {a: parse_flights(p, a) for a, p in paths.items()})
+
+    combined = combine(frames.values())
+    record('identify_optimal_slots', lambda: identify_optimal_slots(combined))
+    record('identify_busiest_slots', lambda: identify_busiest_slots(combined))
+    record('identify_high_impact_flights', lambda: identify_high_impact_flights(combined))
+    record('calculate_airport_metrics', lambda: calculate_airport_metrics(combined, 'Synthetic'))
+
+    series = record('chart_series', lambda: vis.chart_series(frames))
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, data in series.items():
+            record(f'render_plot:{name}', lambda: vis.render_plot(name, data, tmp))
+    return records
+
+
+def run_benchmarks(sizes=BENCHMARK_SIZES, seed=0, memory=True, output=RESULTS_PATH):
+    """Benchmark every size and write the results as JSON for release-to-release comparison"""
+    results = []
+    for n_rows in sizes:
+        print(f"📏 {n_rows:,} rows")
+        results.extend(benchmark_size(n_rows, seed, memory))
+
+    report = {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'seed': seed,
+        'results': results
+    }
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Benchmark results written to {output}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the analytics pipeline on synthetic flights')
+    parser.add_argument('--sizes', type=int, nargs='+', default=BENCHMARK_SIZES, help='row counts to benchmark')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc pass (halves the run time)')
+    parser.add_argument('--output', default=RESULTS_PATH)
+    args = parser.parse_args()
+    run_benchmarks(args.sizes, args.seed, not args.no_memory, args.output)
@@ -0,0 +1,178 @@
+import argparse
+import io
+import json
+import math
+import os
+import re
+from collections import Counter
+from contextlib import redirect_stdout
+from airports import REGISTRY, available_airports
+from loader import load_combined
+from eval import calculate_airport_metrics
+from stats import identify_optimal_slots, identify_busiest_slots
+
+CONTEXT_PATH = 'data/context.txt'
+INDEX_PATH = 'data/context_index.json'
+
+# BM25 parameters; weights are stored as integers in units of 1/WEIGHT_SCALE
+BM25_K1 = 1.2
+BM25_B = 0.75
+WEIGHT_SCALE = 1000
+MIN_CARRIER_FLIGHTS = 10
+
+# Same tokenizer as tokenize() in script.js: lowercase, punctuation to spaces, words of 3+ chars minus stopwords
+STOPWORDS = [
+    'the', 'and', 'for', 'are', 'with', 'that', 'this', 'your', 'from', 'was', 'were', 'have', 'has', 'had',
+    'not', 'but', 'its', 'can', 'will', 'would', 'could', 'a', 'an', 'of', 'to', 'in', 'on', 'at', 'by', 'or',
+    'as', 'it', 'be', 'is', 'am', 'we', 'our', 'they', 'them', 'their', 'there', 'here', 'than', 'then', 'over',
+    'under', 'into', 'out', 'about', 'also', 'any', 'all', 'more', 'most', 'some', 'such', 'if', 'so'
+]
+_STOP = set(STOPWORDS)
+_PUNCTUATION = re.compile(r'[^\w\s]', re.ASCII)
+
+
+def tokenize(text):
+    return [w for w in _PUNCTUATION.sub(' ', text.lower()).split() if len(w) > 2 and w not in _STOP]
+
+
+def _place(airport):
+    info = REGISTRY[airport]
+    return f"{info['city']} ({airport})"
+
+
+def _hour(hour):
+    """'07:00-08:00 (7am)' - the am/pm form keeps a 3+ character token for the hour"""
+    suffix = f"{hour % 12 or 12}{'am' if hour < 12 else 'pm'}"
+    return f"{hour:02d}:00-{(hour + 1) % 24:02d}:00 ({suffix})"
+
+
+def airport_facts(df, airport):
+    """Headline punctuality, peak and carrier facts for one airport from eval.py's metrics"""
+    with redirect_stdout(io.StringIO()):
+        metrics = calculate_airport_metrics(df, airport)
+    place = _place(airport)
+    facts = [
+        f"{place} handled {metrics['total_flights']:,} flights in the dataset.",
+        f"At {place} the average departure delay is {metrics['avg_departure_delay']:.1f} minutes and the "
+        f"on-time departure rate is {metrics['departure_punctuality']:.1f} percent.",
+        f"At {place} the average arrival delay is {metrics['avg_arrival_delay']:.1f} minutes and the "
+        f"on-time arrival rate is {metrics['arrival_punctuality']:.1f} percent.",
+        f"The busiest 60-minute window at {place} had {metrics['peak_60min_movements']} movements and the "
+        f"busiest 10-minute bank had {metrics['peak_10min_movements']} movements."
+    ]
+
+    kpis = metrics['carrier_kpis'].reset_index()
+    kpis = kpis[(kpis['Airport'] == airport) & (kpis['Flights'] >= MIN_CARRIER_FLIGHTS)]
+    for row in kpis.itertuples(index=False):
+        movement = 'departures' if row[2] == 'Departure' else 'arrivals'
+        facts.append(
+            f"{row.Carrier} at {place} operated {row.Flights} {movement} with an average delay of "
+            f"{row.Mean_Delay:.1f} minutes, a median of {row.Median_Delay:.1f} minutes, on-time rate "
+            f"{row.On_Time_Rate:.1f} percent and severe delay rate {row.Severe_Delay_Rate:.1f} percent."
+        )
+    return facts
+
+
+def hourly_facts(df, airport):
+    """Per-hour traffic, delay, rush-hour and best-slot facts from stats.py's slot analysis"""
+    place = _place(airport)
+    slots = identify_optimal_slots(df)
+    traffic, rush = identify_busiest_slots(df)
+    slots = slots[slots['Airport'] == airport]
+    traffic = traffic[traffic['Airport'] == airport].set_index(['Hour', 'Flight Type'])
+    rush = rush[rush['Airport'] == airport]
+
+    facts = []
+    for row in slots.itertuples(index=False):
+        hour, flight_type = int(row.Hour), row[2]
+        congestion = traffic.loc[(row.Hour, flight_type), 'Congestion_Index']
+        facts.append(
+            f"At {place} {flight_type.lower()}s between {_hour(hour)} number {row.Flight_Count} with an "
+            f"average delay of {row.Total_Delay:.1f} minutes and congestion index {congestion:.0f}."
+        )
+    for flight_type, group in slots.groupby('Flight Type', observed=True):
+        best = group.nlargest(3, 'Optimal_Score')['Hour'].astype(int)
+        facts.append(f"The best time slots for {flight_type.lower()}s at {place} are "
+                     + ', '.join(_hour(h) for h in best) + ' with low delay and light traffic.')
+    for flight_type, group in rush.groupby('Flight Type', observed=True):
+        hours = sorted(group['Hour'].astype(int))
+        facts.append(f"The rush hours for {flight_type.lower()}s at {place} are "
+                     + ', '.join(_hour(h) for h in hours) + '.')
+    return facts
+
+
+def build_context(airports=None):
+    """Every fact for every airport, one sentence each"""
+    airports = airports or available_airports()
+    df = load_combined(airports)
+    facts = []
+    for airport in airports:
+        airport_df = df[df['Airport'] == airport]
+        facts.extend(airport_facts(airport_df, airport))
+        facts.extend(hourly_facts(airport_df, airport))
+    return facts
+
+
+def build_index(facts, k1=BM25_K1, b=BM25_B):
+    """
+    BM25 inverted index: term -> [doc id gaps, weights].
+
+    Each posting carries the term's full BM25 contribution for that fact,
+    so ranking a query is a sum of the query terms' postings. Doc ids are
+    delta-encoded and weights quantised to integers to keep the JSON small.
+    """
+    docs = [Counter(tokenize(fact)) for fact in facts]
+    lengths = [sum(doc.values()) for doc in docs]
+    avg_length = sum(lengths) / len(docs) if docs else 0
+    document_frequency = Counter(term for doc in docs for term in doc)
+
+    postings = {}
+    for doc_id, (doc, length) in enumerate(zip(docs, lengths)):
+        norm = k1 * (1 - b + b * length / avg_length)
+        for term, tf in doc.items():
+            n = document_frequency[term]
+            idf = math.log(1 + (len(docs) - n + 0.5) / (n + 0.5))
+            postings.setdefault(term, []).append((doc_id, idf * tf * (k1 + 1) / (tf + norm)))
+
+    terms = {}
+    for term, entries in sorted(postings.items()):
+        ids = [doc_id for doc_id, _ in entries]
+        terms[term] = [[ids[0]] + [later - earlier for earlier, later in zip(ids, ids[1:])],
+                       [max(round(weight * WEIGHT_SCALE), 1) for _, weight in entries]]
+    return {'docs': len(docs), 'scale': WEIGHT_SCALE, 'stopwords': STOPWORDS, 'terms': terms}
+
+
+def search(index, facts, query, k=3):
+    """Top-k facts for a query, ranked the way script.js ranks them"""
+    scores = Counter()
+    for term in set(tokenize(query)):
+        gaps, weights = index['terms'].get(term, ([], []))
+        doc_id = 0
+        for gap, weight in zip(gaps, weights):
+            doc_id += gap
+            scores[doc_id] += weight
+    return [(facts[doc_id], score / index['scale']) for doc_id, score in scores.most_common(k)]
+
+
+def export_chat_context(airports=None, context_path=CONTEXT_PATH, index_path=INDEX_PATH):
+    """Write the chatbot corpus (one fact per line) and its BM25 index"""
+    facts = build_context(airports)
+    index = build_index(facts)
+    os.makedirs(os.path.dirname(context_path) or '.', exist_ok=True)
+    with open(context_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(facts) + '\n')
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'))
+    print(f"✅ {len(facts):,} facts written to {context_path}, {len(index['terms']):,} terms indexed in {index_path}")
+    return facts, index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Build the chatbot context corpus and BM25 index')
+    parser.add_argument('--airports', nargs='+', default=None)
+    parser.add_argument('--query', default=None, help='print the top facts for a query after building')
+    args = parser.parse_args()
+    facts, index = export_chat_context(args.airports)
+    if args.query:
+        for fact, score in search(index, facts, args.query):
+            print(f"   {score:6.2f}  {fact}")
@@ -0,0 +1,164 @@
+import argparse
+
+# Analysis modules are imported inside each command, so a command only pays for what it uses
+# (plotting libraries are loaded by `plots` and `busiest --plot` alone).
+
+
+def _flights(args):
+    """Flights for --airports and --start/--end, read from the partitioned dataset when it has been written"""
+    from dataset import read_flights
+    return read_flights(args.airports, args.start, args.end)
+
+
+def cmd_slots(args):
+    from stats import report_optimal_slots
+    report_optimal_slots(_flights(args), args.airports, args.top)
+
+
+def cmd_busiest(args):
+    from stats import report_busiest_slots
+    report_busiest_slots(_flights(args), args.airports, args.plot)
+
+
+def cmd_impact(args):
+    from stats import report_high_impact
+    report_high_impact(_flights(args), args.top)
+
+
+def cmd_metrics(args):
+    from eval import main
+    main(args.airports, args.workers)
+
+
+def cmd_plots(args):
+    from loader import load_airports
+    from vis import create_individual_visualizations
+    create_individual_visualizations(load_airports(args.airports), render=not args.data_only, workers=args.workers)
+
+
+def cmd_export(args):
+    from export_stats import export_dashboard_stats
+    export_dashboard_stats(args.airports)
+
+
+def cmd_context(args):
+    from chat_context import export_chat_context
+    export_chat_context(args.airports)
+
+
+def cmd_percentiles(args):
+    from sketch import DelaySketches
+    sketches = DelaySketches(_flights(args))
+    print(sketches.percentile_table(by=tuple(args.by)))
+
+
+def cmd_dataset(args):
+    from dataset import write_dataset
+    write_dataset(args.airports)
+
+
+def cmd_optimize(args):
+    import pandas as pd
+    from stats import optimize_schedule
+    for airport in args.airports:
+        recommendations = optimize_schedule(None, pd.Timestamp(args.date).date(), airport, history_days=args.history_days)
+        print(f"🛫 SCHEDULE RECOMMENDATIONS - {airport} {args.date}:")
+        if isinstance(recommendations, str):
+            print(f"   {recommendations}")
+            continue
+        for rec in recommendations:
+            print(f"   [{rec['priority']}] {rec['type']}: {rec['issue']} -> {rec['solution']}")
+
+
+def cmd_live(args):
+    from live import EVENT_LOG_PATH, build_log, replay, print_kpis
+    log = args.log or EVENT_LOG_PATH
+    if args.build:
+        build_log(args.airports, log)
+    print_kpis(replay(log, until=args.until), args.airports)
+
+
+def cmd_serve(args):
+    import asyncio
+    from server import serve
+    asyncio.run(serve(args.host, args.port, args.airports))
+
+
+def build_parser():
+    # --airports is accepted after the subcommand, e.g. `cli.py plots --airports DEL`
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--airports', nargs='+', default=None,
+                        help='IATA codes (default: every registered airport with data)')
+    # Date range for the analyses that read flights; pushed down to the partitioned dataset
+    ranged = argparse.ArgumentParser(add_help=False)
+    ranged.add_argument('--start', default=None, help='first day, YYYY-MM-DD')
+    ranged.add_argument('--end', default=None, help='last day, YYYY-MM-DD')
+
+    parser = argparse.ArgumentParser(description='Airport delay analytics')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    slots = commands.add_parser('slots', parents=[common, ranged], help='best time slots per airport')
+    slots.add_argument('--top', type=int, default=5)
+    slots.set_defaults(run=cmd_slots)
+
+    busiest = commands.add_parser('busiest', parents=[common, ranged], help='congestion hotspots and 15-minute banks')
+    busiest.add_argument('--plot', action='store_true', help='show the hourly traffic chart')
+    busiest.set_defaults(run=cmd_busiest)
+
+    impact = commands.add_parser('impact', parents=[common, ranged], help='flights and carriers causing cascading delays')
+    impact.add_argument('--top', type=int, default=15)
+    impact.set_defaults(run=cmd_impact)
+
+    metrics = commands.add_parser('metrics', parents=[common], help='per-airport performance metrics and comparison')
+    metrics.add_argument('--workers', type=int, default=None)
+    metrics.set_defaults(run=cmd_metrics)
+
+    plots = commands.add_parser('plots', parents=[common], help='chart data and PNG plots')
+    plots.add_argument('--data-only', action='store_true', help='write the chart series as JSON and skip PNG rendering')
+    plots.add_argument('--workers', type=int, default=None)
+    plots.set_defaults(run=cmd_plots)
+
+    export = commands.add_parser('export', parents=[common], help='regenerate dashboard_stats.json')
+    export.set_defaults(run=cmd_export)
+
+    context = commands.add_parser('context', parents=[common], help='chatbot context corpus and BM25 index')
+    context.set_defaults(run=cmd_context)
+
+    percentiles = commands.add_parser('percentiles', parents=[common, ranged], help='delay percentiles from t-digest sketches')
+    percentiles.add_argument('--by', nargs='+', default=['Airport', 'Flight Type'],
+                             choices=['Airport', 'Date', 'Hour', 'Carrier', 'Flight Type'])
+    percentiles.set_defaults(run=cmd_percentiles)
+
+    dataset = commands.add_parser('dataset', parents=[common], help='write the airport/date partitioned Parquet dataset')
+    dataset.set_defaults(run=cmd_dataset)
+
+    optimize = commands.add_parser('optimize', parents=[common], help='slot reallocation and recommendations for one day')
+    optimize.add_argument('--date', required=True, help='day to optimize, YYYY-MM-DD')
+    optimize.add_argument('--history-days', type=int, default=None, help='days of history for the delay model (default: all)')
+    optimize.set_defaults(run=cmd_optimize)
+
+    live = commands.add_parser('live', parents=[common], help='replay the movement event log into running KPIs')
+    live.add_argument('--log', default=None, help='event log (default: data/live_events.jsonl)')
+    live.add_argument('--until', default=None, help='replay events up to this ISO timestamp')
+    live.add_argument('--build', action='store_true', help='write the event log from the airport CSVs first')
+    live.set_defaults(run=cmd_live)
+
+    server = commands.add_parser('serve', parents=[common], help='local JSON API over precomputed aggregates')
+    server.add_argument('--host', default='127.0.0.1')
+    server.add_argument('--port', type=int, default=8000)
+    server.set_defaults(run=cmd_serve)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.airports is None:
+        from airports import available_airports
+        args.airports = available_airports()
+    from profiling import stage
+    with stage(args.command, airports=args.airports):
+        args.run(args)
+
+
+if __name__ == "__main__":
+    main()
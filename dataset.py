@@ -0,0 +1,126 @@
+import argparse
+import os
+import shutil
+import pandas as pd
+from airports import available_airports
+from loader import load_airport, load_combined, _parquet
+from profiling import profiled
+
+DATASET_DIR = 'data/flights'
+
+# Columns the slot scoring and delay model read from history; a projection pushed down to the reader
+HISTORY_COLUMNS = [
+    'Flight Number', 'Carrier', 'Flight Type', 'Departure Delay (min)', 'Arrival Delay (min)',
+    'Scheduled Time (Local)', 'Delay (min)', 'Hour'
+]
+
+
+def _arrow():
+    """pyarrow with pyarrow.dataset loaded, or None when pyarrow is not installed"""
+    pa = _parquet()
+    if pa is None:
+        return None
+    import pyarrow.dataset
+    return pa
+
+
+def _partitioning(pa):
+    return pa.dataset.partitioning(pa.schema([('airport', pa.string()), ('date', pa.string())]), flavor='hive')
+
+
+def _day(value):
+    return pd.Timestamp(value).strftime('%Y-%m-%d')
+
+
+def write_dataset(airports=None, root=DATASET_DIR):
+    """
+    Write each airport's parsed flights as airport=<IATA>/date=<YYYY-MM-DD>/ Parquet files.
+
+    An airport's partitions are replaced as a whole; Airport and Date live
+    in the directory names only and are restored by read_flights.
+    """
+    pa = _arrow()
+    if pa is None:
+        raise RuntimeError('pyarrow is required to write the partitioned dataset')
+    airports = airports or available_airports()
+    for airport in airports:
+        df = load_airport(airport)
+        table = pa.Table.from_pandas(df.drop(columns=['Airport', 'Date']).assign(
+            airport=airport,
+            date=df['Scheduled Time (Local)'].dt.strftime('%Y-%m-%d')
+        ), preserve_index=False)
+
+        shutil.rmtree(os.path.join(root, f'airport={airport}'), ignore_errors=True)
+        pa.dataset.write_dataset(table, root, format='parquet', partitioning=_partitioning(pa),
+                                 basename_template='part-{i}.parquet', existing_data_behavior='overwrite_or_ignore')
+        print(f"✅ {airport}: {len(df):,} flights in {df['Date'].nunique()} daily partitions under {root}")
+
+
+def _open(root, airports=None):
+    """(pyarrow, dataset), or (None, None) without pyarrow or when an airport has not been written"""
+    pa = _arrow()
+    written = os.path.isdir(root) and all(os.path.isdir(os.path.join(root, f'airport={a}')) for a in airports or [])
+    if pa is None or not written:
+        return None, None
+    return pa, pa.dataset.dataset(root, format='parquet', partitioning=_partitioning(pa))
+
+
+def _expression(pa, airports, start, end):
+    """Partition filter on the airport=/date= directory keys"""
+    field = pa.dataset.field
+    expression = None
+    for term in [field('airport').isin(airports) if airports else None,
+                 field('date') >= _day(start) if start is not None else None,
+                 field('date') <= _day(end) if end is not None else None]:
+        if term is not None:
+            expression = term if expression is None else expression & term
+    return expression
+
+
+@profiled()
+def read_flights(airports=None, start=None, end=None, columns=None, root=DATASET_DIR):
+    """
+    Flights for the given airports and inclusive date range, in the loader's frame shape.
+
+    The airport/date filter prunes partitions before any file is opened and
+    `columns` is pushed down to the Parquet reader, so only the matching
+    days' requested columns are read. 'Airport' and 'Date' are always
+    returned. Without pyarrow or a written dataset the CSV loader is used
+    and filtered in memory.
+    """
+    pa, dataset = _open(root, airports)
+    if dataset is None:
+        df = load_combined(airports)
+        if start is not None:
+            df = df[df['Date'] >= pd.Timestamp(start).date()]
+        if end is not None:
+            df = df[df['Date'] <= pd.Timestamp(end).date()]
+        return df[['Airport', 'Date'] + list(columns)] if columns else df
+
+    selected = None if columns is None else list(columns) + ['airport', 'date']
+    df = dataset.to_table(columns=selected, filter=_expression(pa, airports, start, end)).to_pandas()
+    df = df.rename(columns={'airport': 'Airport', 'date': 'Date'})
+    df['Date'] = pd.to_datetime(df['Date']).dt.date
+    for col in ['Airport', 'Carrier', 'Flight Type']:
+        if col in df:
+            df[col] = df[col].astype('category')
+    return df
+
+
+def scan_bytes(airports=None, start=None, end=None, root=DATASET_DIR):
+    """On-disk size of the partitions a read would open (an upper bound on bytes read)"""
+    pa, dataset = _open(root, airports)
+    if dataset is None:
+        return None
+    fragments = dataset.get_fragments(filter=_expression(pa, airports, start, end))
+    return sum(os.path.getsize(fragment.path) for fragment in fragments)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Write the airport/date partitioned Parquet dataset')
+    parser.add_argument('--airports', nargs='+', default=None)
+    parser.add_argument('--root', default=DATASET_DIR)
+    args = parser.parse_args()
+    write_dataset(args.airports, args.root)
+    total = scan_bytes(root=args.root)
+    print(f"📦 {total / 2 ** 20:.1f} MB on disk")
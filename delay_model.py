@@ -0,0 +1,225 @@
+import json
+import numpy as np
+from loader import ensure_time_features
+from airports import REGISTRY
+from aggregates import time_buckets
+
+BUCKET_MINUTES = 15
+DEMAND_WINDOW = 60      # minutes of demand smoothed into the arrival rate of a bucket
+RHO_MAX = 0.95          # utilisation cap for the M/D/1 term; overload is carried by the fluid backlog
+CAPACITY_GRID = np.arange(8, 121, 2)    # candidate effective capacities (movements per hour)
+OFFSET_SHRINK = 20      # movements needed before a bucket's own residual is fully trusted
+DEFAULT_CAPACITY = 40   # movements per hour assumed for an unregistered airport without history
+
+
+def queue_waits(counts, capacity_per_bucket, bucket_minutes=BUCKET_MINUTES):
+    """
+    Deterministic fluid queue over buckets, vectorized over the leading axes.
+
+    backlog[s] = max(0, backlog[s-1] + counts[s] - capacity), computed as
+    S[s] - min(0, min(S[:s+1])) with S the running excess, so there is no
+    Python loop over buckets. Returns the wait (minutes) of a movement in each bucket.
+    """
+    excess = np.cumsum(counts - capacity_per_bucket, axis=-1)
+    backlog = excess - np.minimum(np.minimum.accumulate(excess, axis=-1), 0)
+    return backlog / capacity_per_bucket * bucket_minutes
+
+
+def md1_waits(counts, capacity_per_bucket, bucket_minutes=BUCKET_MINUTES, window=DEMAND_WINDOW):
+    """M/D/1 mean wait (minutes) with the arrival rate taken from a rolling window of demand"""
+    width = max(window // bucket_minutes, 1)
+    padded = np.concatenate([np.zeros(counts.shape[:-1] + (width,)), counts], axis=-1)
+    summed = np.cumsum(padded, axis=-1)
+    rolling = (summed[..., width:] - summed[..., :-width]) / width
+    rho = np.minimum(rolling / capacity_per_bucket, RHO_MAX)
+    service = bucket_minutes / capacity_per_bucket
+    return rho * service / (2 * (1 - rho))
+
+
+def congestion_waits(counts, capacity, bucket_minutes=BUCKET_MINUTES):
+    """Queueing wait per bucket: fluid backlog above capacity plus stochastic M/D/1 wait below it"""
+    counts = np.asarray(counts, dtype=float)
+    capacity_per_bucket = np.asarray(capacity, dtype=float)[..., None] * bucket_minutes / 60
+    return (queue_waits(counts, capacity_per_bucket, bucket_minutes)
+            + md1_waits(counts, capacity_per_bucket, bucket_minutes))
+
+
+class QueueDelayModel:
+    """
+    Predicted lateness per bucket from demand:
+
+        delay[b] = intercept + slope * wait[b](counts, capacity)
+               + weather_coef * precip[b] + offset[b]
+
+    where wait is the queueing wait from congestion_waits, precip the
+    precipitation (mm) in force, and offset the time-of-day residual
+    neither explains (banks, curfews). All methods take counts of shape
+    (..., n_buckets) so any number of candidate schedules are scored in
+    one call; without precip the prediction is for a dry day.
+    """
+
+    def __init__(self, airport, capacity, intercept, slope, offsets, bucket_minutes=BUCKET_MINUTES, weather_coef=0.0):
+        self.airport = airport
+        self.capacity = float(capacity)
+        self.intercept = float(intercept)
+        self.slope = float(slope)
+        self.offsets = np.asarray(offsets, dtype=float)
+        self.bucket_minutes = bucket_minutes
+        self.weather_coef = float(weather_coef)
+
+    @property
+    def n_buckets(self):
+        return 24 * 60 // self.bucket_minutes
+
+    def predict(self, counts, precip=None):
+        """Predicted mean lateness (minutes) of a movement in each bucket"""
+        waits = congestion_waits(counts, self.capacity, self.bucket_minutes)
+        weather = 0 if precip is None else self.weather_coef * np.asarray(precip, dtype=float)
+        return np.clip(self.intercept + self.slope * waits + weather + self.offsets, 0, None)
+
+    def total_delay(self, counts, precip=None):
+        """Predicted total delay minutes of each schedule"""
+        counts = np.asarray(counts, dtype=float)
+        return (self.predict(counts, precip) * counts).sum(axis=-1)
+
+    def schedule_counts(self, scheduled):
+        """Movements per bucket for a series of scheduled times (one day)"""
+        return np.bincount(time_buckets(scheduled.dropna(), self.bucket_minutes), minlength=self.n_buckets)
+
+    def to_dict(self):
+        return {
+            'airport': self.airport,
+            'capacity': self.capacity,
+            'intercept': self.intercept,
+            'slope': self.slope,
+            'offsets': [round(float(v), 3) for v in self.offsets],
+            'bucket_minutes': self.bucket_minutes,
+            'weather_coef': self.weather_coef
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+def demand_matrix(history, airport, bucket_minutes=BUCKET_MINUTES, weather=False):
+    """
+    Per-day demand and observed lateness over buckets for one airport.
+
+    Returns (counts, lateness, known): days x buckets movement counts, mean
+    lateness (early counts as 0) and number of movements with a known delay.
+    With weather=True (history joined by weather.join_weather) a fourth
+    days x buckets matrix holds the precipitation in force, buckets without
+    flights taking the day's mean.
+    """
+    history = ensure_time_features(history)
+    history = history[(history['Airport'] == airport) & history['Scheduled Time (Local)'].notna()]
+    n_buckets = 24 * 60 // bucket_minutes
+
+    days, day_index = np.unique(history['Date'].to_numpy(), return_inverse=True)
+    cells = day_index * n_buckets + time_buckets(history['Scheduled Time (Local)'], bucket_minutes).to_numpy()
+    size = len(days) * n_buckets
+
+    delay = history['Delay (min)'].to_numpy(dtype=float)
+    has_delay = ~np.isnan(delay)
+    counts = np.bincount(cells, minlength=size)
+    known = np.bincount(cells[has_delay], minlength=size)
+    total = np.bincount(cells[has_delay], weights=np.clip(delay[has_delay], 0, None), minlength=size)
+    lateness = np.divide(total, known, out=np.zeros(size), where=known > 0)
+
+    shape = (len(days), n_buckets)
+    if not weather:
+        return counts.reshape(shape), lateness.reshape(shape), known.reshape(shape)
+
+    precip = history['Precip (mm)'].to_numpy(dtype=float)
+    has_precip = ~np.isnan(precip)
+    rain = np.bincount(cells[has_precip], weights=precip[has_precip], minlength=size).reshape(shape)
+    observed = np.bincount(cells[has_precip], minlength=size).reshape(shape)
+    day_mean = rain.sum(axis=1, keepdims=True) / np.maximum(observed.sum(axis=1, keepdims=True), 1)
+    precip = np.where(observed > 0, rain / np.maximum(observed, 1), day_mean)
+    return counts.reshape(shape), lateness.reshape(shape), known.reshape(shape), precip
+
+
+def fit_delay_model(history, airport, bucket_minutes=BUCKET_MINUTES, capacities=CAPACITY_GRID):
+    """
+    Calibrate a QueueDelayModel on the airport's history.
+
+    Every candidate capacity is evaluated at once: congestion waits for all
+    (capacity, day, bucket) cells are computed in one array, the linear
+    terms come from batched weighted least squares per capacity, and the
+    capacity with the smallest weighted error wins. When history carries
+    weather ('Precip (mm)' from weather.join_weather) a precipitation term
+    is fitted alongside, separating weather delay from congestion delay.
+    Per-bucket offsets are the shrunk mean residuals of the winning fit.
+    Without any known delay in history there is nothing to fit: the
+    prior model is returned (declared runway capacity, delay = queueing
+    wait, no offsets).
+    """
+    use_weather = 'Precip (mm)' in history
+    matrices = demand_matrix(history, airport, bucket_minutes, weather=use_weather)
+    counts, lateness, known = matrices[:3]
+    if known.sum() == 0:
+        capacity = REGISTRY.get(airport, {}).get('runway_capacity', DEFAULT_CAPACITY)
+        return QueueDelayModel(airport, capacity, 0.0, 1.0, np.zeros(24 * 60 // bucket_minutes), bucket_minutes)
+    precip = matrices[3] if use_weather else np.zeros_like(lateness)
+    capacities = np.asarray(capacities, dtype=float)
+    waits = congestion_waits(counts[None], capacities[:, None], bucket_minutes)
+
+    # Weighted least squares per capacity: lateness ~ intercept + slope * wait (+ weather * precip)
+    w = known.astype(float)
+    columns = [np.ones_like(waits), waits] + ([np.broadcast_to(precip, waits.shape)] if use_weather else [])
+    X = np.stack(columns, axis=-1)
+    A = np.einsum('cdbk,db,cdbl->ckl', X, w, X) + np.eye(X.shape[-1]) * 1e-9
+    b = np.einsum('cdbk,db,db->ck', X, w, lateness)
+    beta = np.linalg.solve(A, b[..., None])[..., 0]
+
+    # Congestion and rain only ever add delay; refit the intercept after clipping
+    slope = np.clip(beta[:, 1], 0, None)
+    weather_coef = np.clip(beta[:, 2], 0, None) if use_weather else np.zeros(len(capacities))
+    explained = slope[:, None, None] * waits + weather_coef[:, None, None] * precip[None]
+    intercept = (w * (lateness[None] - explained)).sum(axis=(1, 2)) / w.sum()
+    residual = lateness[None] - intercept[:, None, None] - explained
+    best = int(np.argmin((w * residual ** 2).sum(axis=(1, 2))))
+
+    bucket_known = known.sum(axis=0)
+    bucket_residual = (known * residual[best]).sum(axis=0)
+    offsets = bucket_residual / (bucket_known + OFFSET_SHRINK)
+
+    return QueueDelayModel(airport, capacities[best], intercept[best], slope[best], offsets,
+                           bucket_minutes, weather_coef[best])
+
+
+def congestion_delay(history, model):
+    """
+    Delay the model attributes to queueing for each row of history.
+
+    slope * congestion wait of the movement's own (day, bucket), from that
+    day's observed demand at the fitted capacity; 0 for rows without a
+    scheduled time. Returned as an array aligned with history's rows.
+    """
+    history = ensure_time_features(history)
+    scheduled = history['Scheduled Time (Local)']
+    valid = scheduled.notna().to_numpy()
+    days, day_index = np.unique(history['Date'].to_numpy()[valid], return_inverse=True)
+    cells = day_index * model.n_buckets + time_buckets(scheduled[valid], model.bucket_minutes).to_numpy()
+    counts = np.bincount(cells, minlength=len(days) * model.n_buckets).reshape(len(days), model.n_buckets)
+
+    waits = congestion_waits(counts, model.capacity, model.bucket_minutes)
+    congestion = np.zeros(len(history))
+    congestion[valid] = model.slope * waits.ravel()[cells]
+    return congestion
+
+
+def fit_delay_models(df, airports, bucket_minutes=BUCKET_MINUTES):
+    """One fitted model per airport"""
+    return {airport: fit_delay_model(df, airport, bucket_minutes) for airport in airports}
+
+
+def save_models(models, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({airport: model.to_dict() for airport, model in models.items()}, f, indent=2)
+
+
+def load_models(path):
+    with open(path, encoding='utf-8') as f:
+        return {airport: QueueDelayModel.from_dict(data) for airport, data in json.load(f).items()}
@@ -1,6 +1,20 @@
 import pandas as pd
 import numpy as np
+import argparse
+import io
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from loader import load_airport, ensure_time_features
+from airports import available_airports, airport_label
+from aggregates import carrier_kpis
+from timeseries import movement_series, peak_window
+from profiling import profiled
 
+# Comparison rows that are counts, printed as integers
+COUNT_ROWS = ['Total Flights', 'Peak 60-min Movements']
+
+
+@profiled()
 def calculate_airport_metrics(df, airport_name):
     """
     Calculate comprehensive airport performance metrics
@@ -10,6 +24,8 @@ def calculate_airport_metrics(df, airport_name):
     print(f"AIRPORT PERFORMANCE METRICS FOR {airport_name.upper()}")
     print(f"{'='*60}")
     
+    df = ensure_time_features(df)
+
     # Basic statistics
     total_flights = len(df)
     departures = df[df['Flight Type'] == 'Departure']
@@ -65,29 +81,16 @@ def calculate_airport_metrics(df, airport_name):
         percentage = (count / total_flights) * 100
         print(f"   {i:2d}. {carrier:<20} {count:4d} flights ({percentage:5.1f}%)")
     
-    # Carrier delay analysis (for carriers with significant operations)
-    print(f"\n5. CARRIER DELAY PERFORMANCE (Carriers with >50 flights):")
-    major_carriers = df['Carrier'].value_counts()[df['Carrier'].value_counts() > 50].index
-    
-    carrier_delay_stats = []
-    for carrier in major_carriers:
-        carrier_data = df[df['Carrier'] == carrier]
-        
-        # Departure delays
-        dep_delays = carrier_data[carrier_data['Flight Type'] == 'Departure']['Departure Delay (min)'].dropna()
-        arr_delays = carrier_data[carrier_data['Flight Type'] == 'Arrival']['Arrival Delay (min)'].dropna()
-        
-        avg_dep_delay = dep_delays.mean() if len(dep_delays) > 0 else 0
-        avg_arr_delay = arr_delays.mean() if len(arr_delays) > 0 else 0
-        
-        carrier_delay_stats.append({
-            'Carrier': carrier,
-            'Total_Flights': len(carrier_data),
-            'Avg_Dep_Delay': avg_dep_delay,
-            'Avg_Arr_Delay': avg_arr_delay
-        })
+    # Carrier delay analysis - every carrier from one groupby
+    print(f"\n5. CARRIER DELAY PERFORMANCE (Top 10 of all carriers):")
+    kpis = carrier_kpis(df)
     
-    carrier_df = pd.DataFrame(carrier_delay_stats).sort_values('Total_Flights', ascending=False)
+    mean_delays = kpis['Mean_Delay'].unstack('Flight Type').fillna(0)
+    carrier_df = pd.DataFrame({
+        'Total_Flights': kpis['Flights'].groupby(level=['Airport', 'Carrier'], observed=True).sum(),
+        'Avg_Dep_Delay': mean_delays.get('Departure', 0),
+        'Avg_Arr_Delay': mean_delays.get('Arrival', 0)
+    }).reset_index().sort_values('Total_Flights', ascending=False)
     
     for _, row in carrier_df.head(10).iterrows():
         print(f"   {row['Carrier']:<20} Flights: {row['Total_Flights']:3d} | "
@@ -96,59 +99,93 @@ def calculate_airport_metrics(df, airport_name):
     # Hourly distribution
     print(f"\n6. FLIGHT DISTRIBUTION BY HOUR:")
     
-    # Extract hours from scheduled times
-    def extract_hour(time_str):
-        if pd.isna(time_str):
-            return None
-        try:
-            return pd.to_datetime(time_str).hour
-        except:
-            return None
-    
-    # Departure hours
-    dep_scheduled = departures['Scheduled Departure (Local)'].dropna()
-    if len(dep_scheduled) > 0:
-        dep_hours = dep_scheduled.apply(extract_hour).dropna()
+    # Hours come from the vectorized parse in loader.add_time_features (bad timestamps are NaT)
+    dep_hours = departures['Hour'].dropna().astype(int)
+    if len(dep_hours) > 0:
         hourly_dep = dep_hours.value_counts().sort_index()
         print("   Busiest Departure Hours:")
         for hour, count in hourly_dep.head(5).items():
             print(f"     {hour:2d}:00 - {count:3d} departures")
     
-    # Arrival hours
-    arr_scheduled = arrivals['Scheduled Arrival (Local)'].dropna()
-    if len(arr_scheduled) > 0:
-        arr_hours = arr_scheduled.apply(extract_hour).dropna()
+    arr_hours = arrivals['Hour'].dropna().astype(int)
+    if len(arr_hours) > 0:
         hourly_arr = arr_hours.value_counts().sort_index()
         print("   Busiest Arrival Hours:")
         for hour, count in hourly_arr.head(5).items():
             print(f"     {hour:2d}:00 - {count:3d} arrivals")
     
+    # Sub-hour banks: busiest trailing windows over all movements
+    movements = movement_series(df)
+    peak_start, peak_end, peak_60 = peak_window(movements, 60)
+    bank_start, bank_end, peak_10 = peak_window(movements, 10)
+    if peak_60 > 0:
+        print(f"   Busiest 60-minute window: {peak_60} movements "
+              f"({peak_start:%Y-%m-%d %H:%M}-{peak_end:%H:%M})")
+        print(f"   Busiest 10-minute bank: {peak_10} movements "
+              f"({bank_start:%Y-%m-%d %H:%M}-{bank_end:%H:%M})")
+    
     return {
         'total_flights': total_flights,
+        'carrier_kpis': kpis,
+        'peak_60min_movements': peak_60,
+        'peak_10min_movements': peak_10,
         'departure_punctuality': departure_punctuality if len(departure_delays) > 0 else 0,
         'arrival_punctuality': arrival_punctuality if len(arrival_delays) > 0 else 0,
         'avg_departure_delay': departure_delays.mean() if len(departure_delays) > 0 else 0,
         'avg_arrival_delay': arrival_delays.mean() if len(arrival_delays) > 0 else 0
     }
 
-# Load the data
-blore_df = pd.read_csv('data/blore_airport_data.csv')
-delhi_df = pd.read_csv('data/delhi_airport_data.csv')
+def analyze_airport(airport):
+    """Load one airport and compute its metrics; the printed report is captured and returned"""
+    report = io.StringIO()
+    with redirect_stdout(report):
+        metrics = calculate_airport_metrics(load_airport(airport), airport_label(airport))
+    return airport, metrics, report.getvalue()
+
+
+def compare_airports(results):
+    """Cross-airport comparison table (one column per airport)"""
+    rows = {
+        'Total Flights': 'total_flights',
+        'Departure Punctuality (≤15min, %)': 'departure_punctuality',
+        'Arrival Punctuality (≤15min, %)': 'arrival_punctuality',
+        'Avg Departure Delay (min)': 'avg_departure_delay',
+        'Avg Arrival Delay (min)': 'avg_arrival_delay',
+        'Peak 60-min Movements': 'peak_60min_movements'
+    }
+    return pd.DataFrame({
+        airport_label(airport): {label: metrics[key] for label, key in rows.items()}
+        for airport, metrics in results.items()
+    })
 
-# Calculate metrics for both airports
-blore_metrics = calculate_airport_metrics(blore_df, 'Bangalore')
-delhi_metrics = calculate_airport_metrics(delhi_df, 'Delhi')
 
-# Comparative analysis
-print(f"\n{'='*60}")
-print("COMPARATIVE ANALYSIS")
-print(f"{'='*60}")
+def main(airports=None, workers=None):
+    """Analyze every airport in a process pool and print the reports plus a comparison"""
+    airports = airports or available_airports()
+    if not airports:
+        raise ValueError('no airports to analyze')
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        outcomes = list(pool.map(analyze_airport, airports))
+
+    results = {}
+    for airport, metrics, report in outcomes:
+        print(report, end='')
+        results[airport] = metrics
+
+    # Comparative analysis
+    print(f"\n{'='*60}")
+    print("COMPARATIVE ANALYSIS")
+    print(f"{'='*60}\n")
+    comparison = compare_airports(results)
+    table = comparison.round(1).astype(object)
+    table.loc[COUNT_ROWS] = comparison.loc[COUNT_ROWS].astype(int)
+    print(table.to_string())
+    return results, comparison
 
-print(f"\nMetric                          Bangalore    Delhi")
-print(f"{'─'*50}")
-print(f"Total Flights                   {blore_metrics['total_flights']:8,} {delhi_metrics['total_flights']:8,}")
-print(f"Departure Punctuality (≤15min)    {blore_metrics['departure_punctuality']:6.1f}%   {delhi_metrics['departure_punctuality']:6.1f}%")
-print(f"Arrival Punctuality (≤15min)      {blore_metrics['arrival_punctuality']:6.1f}%   {delhi_metrics['arrival_punctuality']:6.1f}%")
-print(f"Avg Departure Delay               {blore_metrics['avg_departure_delay']:6.1f}min  {delhi_metrics['avg_departure_delay']:6.1f}min")
-print(f"Avg Arrival Delay                 {blore_metrics['avg_arrival_delay']:6.1f}min  {delhi_metrics['avg_arrival_delay']:6.1f}min")
 
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Airport performance metrics for the registered airports')
+    parser.add_argument('--airports', nargs='+', default=None, help='IATA codes (default: every airport with data)')
+    parser.add_argument('--workers', type=int, default=None, help='processes used for the per-airport analyses')
+    args = parser.parse_args()
+    main(args.airports, args.workers)
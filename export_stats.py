@@ -0,0 +1,215 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from loader import load_airports, CSV_DTYPES
+
+STATS_PATH = 'dashboard_stats.json'
+PARTIALS_PATH = '.cache/dashboard_partials.json'
+
+# Delay distribution bins as drawn by the dashboard: (-60,-30], (-30,0], ..., (150,180]
+DELAY_BINS = [-60, -30, 0, 30, 60, 90, 120, 150, 180]
+# On-time (<=15), delayed (16-60), severe (>60); the dashboard labels the last one 'cancelled'
+SEVERITY_BINS = [-np.inf, 15, 60, np.inf]
+
+HOUR_LABELS = [f'{h:02d}:00' for h in range(24)]
+WEEKDAY_LABELS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+
+def _day_keys(df):
+    return df['Scheduled Time (Local)'].dt.strftime('%Y-%m-%d').fillna('undated')
+
+
+def day_fingerprints(df, day_keys):
+    """Order-independent hash of each day's source rows"""
+    hashes = pd.util.hash_pandas_object(df[list(CSV_DTYPES)], index=False)
+    return hashes.groupby(day_keys.to_numpy()).agg(lambda h: str(int(h.to_numpy().sum())))
+
+
+def _moments(values):
+    values = values.dropna()
+    return [int(len(values)), float(values.sum()), float((values ** 2).sum())]
+
+
+def _counts(series):
+    return {str(k): int(v) for k, v in series.value_counts().items() if v > 0}
+
+
+def day_partial(day):
+    """Mergeable partial aggregates (counts, sums, sums of squares, histogram bins) for one day"""
+    departures = day[day['Flight Type'] == 'Departure']
+    arrivals = day[day['Flight Type'] == 'Arrival']
+    delays = day['Delay (min)'].dropna()
+
+    carrier_delays = day[['Carrier']].assign(Delay=day['Delay (min)'], Squared=day['Delay (min)'] ** 2)
+    carrier_delays = carrier_delays.dropna().groupby('Carrier', observed=True).agg(
+        n=('Delay', 'size'), total=('Delay', 'sum'), squares=('Squared', 'sum'))
+
+    return {
+        'flights': len(day),
+        'flight_types': _counts(day['Flight Type']),
+        'carriers': _counts(day['Carrier']),
+        'departure_delay': _moments(departures['Departure Delay (min)']),
+        'arrival_delay': _moments(arrivals['Arrival Delay (min)']),
+        'carrier_delay': {
+            str(carrier): [int(row.n), float(row.total), float(row.squares)]
+            for carrier, row in carrier_delays.iterrows()
+        },
+        'hourly_departures': np.bincount(departures['Hour'].dropna().astype(int), minlength=24).tolist(),
+        'weekday_departures': np.bincount(departures['Weekday'].dropna().astype(int), minlength=7).tolist(),
+        'known_delays': int(len(delays)),
+        'delay_histogram': pd.cut(delays, DELAY_BINS).value_counts(sort=False).astype(int).tolist(),
+        'severity': pd.cut(delays, SEVERITY_BINS).value_counts(sort=False).astype(int).tolist()
+    }
+
+
+def update_partials(frames, partials):
+    """
+    Refresh per-day partials in place, recomputing only days whose rows changed.
+
+    Returns the number of recomputed days per airport.
+    """
+    recomputed = {}
+    for airport, df in frames.items():
+        day_keys = _day_keys(df)
+        fingerprints = day_fingerprints(df, day_keys)
+        stored = partials.get(airport, {})
+
+        stale = [day for day, fp in fingerprints.items()
+                 if stored.get(day, {}).get('fingerprint') != fp]
+        updated = {day: stored[day] for day in fingerprints.index if day not in stale}
+
+        stale_mask = day_keys.isin(stale).to_numpy()
+        for day, rows in df[stale_mask].groupby(day_keys[stale_mask].to_numpy()):
+            updated[day] = dict(day_partial(rows), fingerprint=fingerprints[day])
+
+        partials[airport] = dict(sorted(updated.items()))
+        recomputed[airport] = len(stale)
+    return recomputed
+
+
+def _add_counts(total, counts):
+    for key, value in counts.items():
+        total[key] = total.get(key, 0) + value
+
+
+def merge_partials(days):
+    """Merge per-day partials into airport totals"""
+    merged = {
+        'flights': 0, 'flight_types': {}, 'carriers': {}, 'carrier_delay': {},
+        'departure_delay': np.zeros(3), 'arrival_delay': np.zeros(3),
+        'hourly_departures': np.zeros(24, dtype=int), 'weekday_departures': np.zeros(7, dtype=int),
+        'known_delays': 0, 'delay_histogram': np.zeros(len(DELAY_BINS) - 1, dtype=int),
+        'severity': np.zeros(len(SEVERITY_BINS) - 1, dtype=int)
+    }
+    for day in days:
+        merged['flights'] += day['flights']
+        merged['known_delays'] += day['known_delays']
+        _add_counts(merged['flight_types'], day['flight_types'])
+        _add_counts(merged['carriers'], day['carriers'])
+        for carrier, moments in day['carrier_delay'].items():
+            merged['carrier_delay'][carrier] = merged['carrier_delay'].get(carrier, np.zeros(3)) + moments
+        for key in ['departure_delay', 'arrival_delay', 'hourly_departures',
+                    'weekday_departures', 'delay_histogram', 'severity']:
+            merged[key] = merged[key] + np.asarray(day[key])
+    return merged
+
+
+def _mean(moments):
+    return float(moments[1] / moments[0]) if moments[0] else 0
+
+
+def _top(counts, n):
+    return sorted(counts.items(), key=lambda item: item[1], reverse=True)[:n]
+
+
+def build_dashboard_stats(partials, airports):
+    """Assemble the dashboard_stats.json schema read by script.js"""
+    totals = {airport: merge_partials(partials[airport].values()) for airport in airports}
+
+    stats = {
+        'flight_counts': {airport: totals[airport]['flights'] for airport in airports},
+        'flight_type_distribution': {},
+        'top_airlines': {},
+        'delay_stats': {},
+        'hourly_traffic': {},
+        'daily_traffic': {},
+        'delay_distribution': {},
+        'ontime_performance': {},
+        'carrier_delays': {},
+        'delay_severity': {}
+    }
+    stats['flight_counts']['total'] = sum(t['flights'] for t in totals.values())
+
+    for airport, t in totals.items():
+        flight_types = _top(t['flight_types'], len(t['flight_types']))
+        airlines = _top(t['carriers'], 8)
+        severity = t['severity'] / t['known_delays'] * 100 if t['known_delays'] else t['severity'] * 0.0
+        ontime = [round(float(v), 1) for v in severity]
+
+        stats['flight_type_distribution'][airport] = {
+            'labels': [k for k, _ in flight_types], 'data': [v for _, v in flight_types]}
+        stats['top_airlines'][airport] = {
+            'labels': [k for k, _ in airlines], 'data': [v for _, v in airlines]}
+        stats['delay_stats'][airport] = {
+            'avg_departure_delay': _mean(t['departure_delay']),
+            'avg_arrival_delay': _mean(t['arrival_delay']),
+            'total_delays': t['flights']
+        }
+        stats['hourly_traffic'][airport] = t['hourly_departures'].tolist()
+        stats['daily_traffic'][airport] = t['weekday_departures'].tolist()
+        stats['delay_distribution'][airport] = (
+            (t['delay_histogram'] / t['known_delays']).tolist() if t['known_delays'] else [0] * len(t['delay_histogram']))
+        stats['ontime_performance'][airport] = dict(zip(['on_time', 'delayed', 'cancelled'], ontime))
+        stats['carrier_delays'][airport] = {
+            carrier: _mean(t['carrier_delay'].get(carrier, [0, 0, 0])) for carrier, _ in _top(t['carriers'], 5)}
+        stats['delay_severity'][airport] = ontime
+
+    stats['hourly_traffic']['labels'] = HOUR_LABELS
+    stats['daily_traffic']['labels'] = WEEKDAY_LABELS
+    stats['delay_distribution']['labels'] = [str(edge) for edge in DELAY_BINS[:-1]]
+    return stats
+
+
+def load_partials(path=PARTIALS_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_json(data, path):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+
+
+def export_dashboard_stats(airports=None, stats_path=STATS_PATH, partials_path=PARTIALS_PATH):
+    """
+    Regenerate dashboard_stats.json, recomputing only the days whose source rows changed.
+
+    Raises RuntimeError, leaving both files untouched, when no airport has
+    flights: overwriting the committed stats with zeros would blank the
+    dashboard.
+    """
+    frames = load_airports(airports)
+    if not frames:
+        raise RuntimeError(f'no airport data loaded; {stats_path} was not written')
+    partials = load_partials(partials_path)
+    recomputed = update_partials(frames, partials)
+
+    stats = build_dashboard_stats(partials, list(frames))
+    if stats['flight_counts']['total'] == 0:
+        raise RuntimeError(f'no flights in {", ".join(frames)}; {stats_path} was not written')
+    save_json(partials, partials_path)
+    save_json(stats, stats_path)
+
+    for airport, count in recomputed.items():
+        print(f"{airport}: recomputed {count} of {len(partials[airport])} days")
+    print(f"✅ Dashboard stats written to {stats_path}")
+    return stats
+
+
+if __name__ == "__main__":
+    export_dashboard_stats()
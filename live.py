@@ -0,0 +1,272 @@
+import argparse
+import json
+import os
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from airports import REGISTRY, available_airports, airport_label
+from scrape_data import parse_flights, row_key, fetch_flight_data
+
+EVENT_LOG_PATH = 'data/live_events.jsonl'
+ON_TIME_MINUTES = 15
+# Bands of vis.py's delay severity plot: on time (<=15), minor (16-60), major (61-120), severe (>120)
+SEVERITY_EDGES = [15, 60, 120]
+SEVERITY_LABELS = ['on_time', 'minor', 'major', 'severe']
+FIELDS = ['flights', 'known', 'delay_sum', 'delay_sq', 'on_time'] + [f'severity_{s}' for s in SEVERITY_LABELS]
+DIRECTIONS = {'Arrival': 'arrivals', 'Departure': 'departures'}
+POLL_WINDOW = timedelta(hours=6)    # AeroDataBox serves at most 12 hours per request
+POLL_INTERVAL = 300
+
+
+class LiveAggregator:
+    """
+    Running airport, hourly and carrier totals over a stream of movement events.
+
+    A movement is keyed like scrape_data's CSV dedup (airport, flight number,
+    scheduled time, direction) and contributes one record to its
+    (airport, type), (airport, hour, type) and (airport, carrier, type)
+    totals. A new revised time retracts the movement's previous record and
+    adds the new one, so each event costs O(1) and so does each KPI read.
+    """
+
+    def __init__(self):
+        self.movements = {}
+        self.totals = {}
+        self.last_seq = 0
+        self.last_at = None
+
+    def _record(self, row):
+        """(flight type, hour, carrier, delay) of one parsed scrape_data row"""
+        flight_type = row[1]
+        scheduled = row[4] if flight_type == 'Departure' else row[7]
+        delay = row[6] if flight_type == 'Departure' else row[9]
+        hour = datetime.fromisoformat(scheduled).hour if scheduled else None
+        return flight_type, hour, row[2], None if delay == '' else float(delay)
+
+    def _apply(self, airport, record, sign):
+        flight_type, hour, carrier, delay = record
+        delta = [1, 0, 0.0, 0.0, 0, 0, 0, 0, 0]
+        if delay is not None:
+            delta[1:5] = [1, delay, delay * delay, int(delay <= ON_TIME_MINUTES)]
+            delta[5 + bisect_left(SEVERITY_EDGES, delay)] = 1
+        for key in [('airport', airport, flight_type),
+                    ('hour', airport, hour, flight_type),
+                    ('carrier', airport, carrier, flight_type)]:
+            totals = self.totals.setdefault(key, [0] * len(FIELDS))
+            for i, value in enumerate(delta):
+                totals[i] += sign * value
+
+    def apply(self, event):
+        """Apply one event; returns True if any total changed"""
+        airport = event['airport']
+        rows = parse_flights(airport_label(airport), {event['direction']: [event['flight']]})
+        self.last_seq = event.get('seq', self.last_seq)
+        self.last_at = event.get('at', self.last_at)
+        if not rows:
+            return False
+
+        key = (airport,) + row_key(rows[0])
+        record = None if event.get('type') == 'remove' else self._record(rows[0])
+        previous = self.movements.pop(key, None)
+        if previous == record:
+            if record is not None:
+                self.movements[key] = record
+            return False
+        if previous is not None:
+            self._apply(airport, previous, -1)
+        if record is not None:
+            self._apply(airport, record, +1)
+            self.movements[key] = record
+        return True
+
+    def stats(self, *key):
+        """Counts, mean delay, on-time rate and severity bands for one totals key"""
+        totals = self.totals.get(key, [0] * len(FIELDS))
+        return _stats(totals)
+
+    def kpis(self, airport):
+        """The headline numbers of eval.calculate_airport_metrics, read from the running totals"""
+        departures = self.totals.get(('airport', airport, 'Departure'), [0] * len(FIELDS))
+        arrivals = self.totals.get(('airport', airport, 'Arrival'), [0] * len(FIELDS))
+        both = [d + a for d, a in zip(departures, arrivals)]
+        dep, arr, total = _stats(departures), _stats(arrivals), _stats(both)
+        return {
+            'total_flights': total['flights'],
+            'departures': dep['flights'],
+            'arrivals': arr['flights'],
+            'departure_punctuality': dep['on_time_rate'],
+            'arrival_punctuality': arr['on_time_rate'],
+            'avg_departure_delay': dep['mean_delay'],
+            'avg_arrival_delay': arr['mean_delay'],
+            'severity': total['severity']
+        }
+
+    def table(self, level, airport, flight_type=None):
+        """{hour or carrier: stats} for one airport, both flight types merged unless one is given"""
+        merged = {}
+        for key, totals in self.totals.items():
+            if key[0] != level or key[1] != airport or (flight_type and key[3] != flight_type):
+                continue
+            current = merged.setdefault(key[2], [0] * len(FIELDS))
+            for i, value in enumerate(totals):
+                current[i] += value
+        return {group: _stats(totals) for group, totals in merged.items() if totals[0] > 0}
+
+
+def _stats(totals):
+    flights, known, delay_sum, _, on_time = totals[:5]
+    return {
+        'flights': flights,
+        'mean_delay': delay_sum / known if known else 0,
+        'on_time_rate': on_time / known * 100 if known else 0,
+        'severity': dict(zip(SEVERITY_LABELS, totals[5:]))
+    }
+
+
+class EventLog:
+    """
+    Append-only JSONL log of movement events, flushed per event.
+
+    Each line is {'seq', 'at', 'airport', 'direction', 'flight'} plus
+    'type': 'remove' for withdrawn movements; 'flight' is the AeroDataBox
+    flight object as returned by the airport movements endpoint.
+    """
+
+    def __init__(self, path=EVENT_LOG_PATH):
+        self.path = path
+        self.seq = sum(1 for _ in read_events(path)) if os.path.exists(path) else 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def append(self, event):
+        self.seq += 1
+        event = dict(event, seq=self.seq)
+        self.file.write(json.dumps(event, separators=(',', ':')) + '\n')
+        self.file.flush()
+        return event
+
+    def close(self):
+        self.file.close()
+
+
+def read_events(path=EVENT_LOG_PATH):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def replay(path=EVENT_LOG_PATH, aggregator=None, until=None):
+    """Rebuild the running totals from the log, optionally only up to an ISO timestamp"""
+    aggregator = aggregator or LiveAggregator()
+    until = datetime.fromisoformat(until) if until else None
+    for event in read_events(path):
+        if until is not None and datetime.fromisoformat(event['at']) > until:
+            break
+        aggregator.apply(event)
+    return aggregator
+
+
+def events_from_response(airport, response, at):
+    """One event per flight of an AeroDataBox airport movements response"""
+    for direction in DIRECTIONS.values():
+        for flight in (response or {}).get(direction, []):
+            yield {'at': at, 'airport': airport, 'direction': direction, 'flight': flight}
+
+
+def _utc(local):
+    return datetime.fromisoformat(local).astimezone(timezone.utc).strftime('%Y-%m-%d %H:%MZ')
+
+
+def events_from_frame(df, lead_minutes=180):
+    """
+    Offline event stream from loaded flights, in time order.
+
+    Each movement is announced lead_minutes before its scheduled time with
+    no revised time, then revised at its scheduled time when it was late or
+    early, so a replay exercises both add and retract.
+    """
+    events = []
+    for row in df.itertuples(index=False):
+        flight_type = row[1]
+        scheduled = row[4] if flight_type == 'Departure' else row[7]
+        revised = row[5] if flight_type == 'Departure' else row[8]
+        if not isinstance(scheduled, str):
+            continue
+        movement = {'scheduledTime': {'local': scheduled, 'utc': _utc(scheduled)}}
+        flight = {'number': row[3], 'airline': {'name': row[2] if isinstance(row[2], str) else ''}, 'movement': movement}
+        scheduled_at = datetime.fromisoformat(scheduled)
+        base = {'airport': row.Airport, 'direction': DIRECTIONS[flight_type]}
+        events.append(dict(base, at=(scheduled_at - timedelta(minutes=lead_minutes)).isoformat(), flight=flight))
+        if isinstance(revised, str) and revised != scheduled:
+            revised_flight = dict(flight, movement=dict(movement, revisedTime={'local': revised, 'utc': _utc(revised)}))
+            events.append(dict(base, at=scheduled_at.isoformat(), flight=revised_flight))
+    events.sort(key=lambda e: datetime.fromisoformat(e['at']))
+    return events
+
+
+def build_log(airports=None, path=EVENT_LOG_PATH):
+    """Write a replayable event log from the airport CSVs (raw strings, not the parsed frames)"""
+    import pandas as pd
+    from loader import AIRPORT_FILES, CSV_DTYPES
+    airports = airports or available_airports()
+    frames = [pd.read_csv(AIRPORT_FILES[a], dtype=CSV_DTYPES).assign(Airport=a) for a in airports]
+    if os.path.exists(path):
+        os.remove(path)
+    log = EventLog(path)
+    try:
+        for event in events_from_frame(pd.concat(frames, ignore_index=True)):
+            log.append(event)
+    finally:
+        log.close()
+    print(f"✅ {log.seq:,} events written to {path}")
+
+
+def follow(airports, path=EVENT_LOG_PATH, interval=POLL_INTERVAL):
+    """Poll AeroDataBox around now and log only the movements whose record changed"""
+    aggregator = replay(path) if os.path.exists(path) else LiveAggregator()
+    log = EventLog(path)
+    try:
+        while True:
+            now = datetime.now(timezone.utc)
+            for airport in airports:
+                # Movement windows are requested in the airport's local time
+                local = now.astimezone(ZoneInfo(REGISTRY[airport]['timezone']))
+                window = [(local - POLL_WINDOW).strftime('%Y-%m-%dT%H:%M'), (local + POLL_WINDOW).strftime('%Y-%m-%dT%H:%M')]
+                response = fetch_flight_data(REGISTRY[airport]['icao'], *window, use_cache=False)
+                for event in events_from_response(airport, response, now.isoformat()):
+                    if aggregator.apply(event):
+                        log.append(event)
+                print_kpis(aggregator, [airport])
+            time.sleep(interval)
+    finally:
+        log.close()
+
+
+def print_kpis(aggregator, airports):
+    for airport in airports:
+        k = aggregator.kpis(airport)
+        print(f"✈️ {airport}: {k['total_flights']:,} flights | "
+              f"dep {k['avg_departure_delay']:.1f} min ({k['departure_punctuality']:.1f}% on time) | "
+              f"arr {k['avg_arrival_delay']:.1f} min ({k['arrival_punctuality']:.1f}% on time)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Streaming movement KPIs from a replayable event log')
+    parser.add_argument('--log', default=EVENT_LOG_PATH)
+    parser.add_argument('--airports', nargs='+', default=None)
+    parser.add_argument('--build', action='store_true', help='write the event log from the airport CSVs')
+    parser.add_argument('--until', default=None, help='replay events up to this ISO timestamp')
+    parser.add_argument('--follow', action='store_true', help='poll AeroDataBox and append changed movements')
+    args = parser.parse_args()
+
+    airports = args.airports or available_airports()
+    if args.build:
+        build_log(airports, args.log)
+    if args.follow:
+        follow(airports, args.log)
+    else:
+        aggregator = replay(args.log, until=args.until)
+        print(f"🔁 Replayed to event {aggregator.last_seq:,} ({aggregator.last_at})")
+        print_kpis(aggregator, airports)
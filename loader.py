@@ -0,0 +1,157 @@
+import os
+import pandas as pd
+from airports import REGISTRY, available_airports
+from profiling import stage, profiled
+
+_pyarrow = None
+
+
+def _parquet():
+    """pyarrow (and pyarrow.parquet), imported on first cache access; None when not installed"""
+    global _pyarrow
+    if _pyarrow is None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+            _pyarrow = pyarrow
+        except ImportError:  # cache is skipped, CSVs are parsed on every run
+            _pyarrow = False
+    return _pyarrow or None
+
+# Source CSVs per airport (IATA code -> path), from the airport registry
+AIRPORT_FILES = {code: info['data'] for code, info in REGISTRY.items()}
+
+CACHE_DIR = '.cache/flights'
+
+# Local times are written as '2025-08-16 00:10+05:30'
+TIME_FORMAT = '%Y-%m-%d %H:%M%z'
+
+SCHEDULE_COLUMNS = ['Scheduled Departure (Local)', 'Scheduled Arrival (Local)']
+
+CSV_DTYPES = {
+    'Airport Name': 'string',
+    'Flight Type': 'category',
+    'Carrier': 'category',
+    'Flight Number': 'string',
+    'Scheduled Departure (Local)': 'string',
+    'Revised Departure (Local)': 'string',
+    'Departure Delay (min)': 'float64',
+    'Scheduled Arrival (Local)': 'string',
+    'Revised Arrival (Local)': 'string',
+    'Arrival Delay (min)': 'float64'
+}
+
+
+def parse_local_times(values):
+    """Parse '+05:30' local time strings in one vectorized pass; bad values become NaT"""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    return pd.to_datetime(values, format=TIME_FORMAT, errors='coerce')
+
+
+@profiled('parse_datetimes')
+def add_time_features(df):
+    """
+    Parse both schedule columns and add per-movement time features.
+
+    Every row is a single movement: departures only carry the departure
+    columns and arrivals only the arrival ones, so the movement's own
+    scheduled time and delay are coalesced into 'Scheduled Time (Local)'
+    and 'Delay (min)'. Hour/Minute/Weekday/Date are derived from it.
+    """
+    for col in SCHEDULE_COLUMNS:
+        df[col] = parse_local_times(df[col])
+
+    is_departure = (df['Flight Type'] == 'Departure').to_numpy()
+    df['Scheduled Time (Local)'] = df['Scheduled Departure (Local)'].where(
+        is_departure, df['Scheduled Arrival (Local)'])
+    df['Delay (min)'] = df['Departure Delay (min)'].where(
+        is_departure, df['Arrival Delay (min)'])
+
+    scheduled = df['Scheduled Time (Local)'].dt
+    df['Hour'] = scheduled.hour
+    df['Minute'] = scheduled.minute
+    df['Weekday'] = scheduled.weekday
+    df['Date'] = scheduled.date
+    return df
+
+
+def ensure_time_features(df):
+    """Add the parsed time features to frames that did not come through the loader"""
+    if 'Scheduled Time (Local)' in df:
+        return df
+    return add_time_features(df.copy())
+
+
+def parse_flights(path, airport):
+    """Read one airport CSV with explicit dtypes and parsed timestamps"""
+    with stage('read_csv', airport=airport) as record:
+        df = pd.read_csv(path, dtype=CSV_DTYPES)
+        record['rows'] = len(df)
+    df['Airport'] = pd.Categorical([airport] * len(df))
+    return add_time_features(df)
+
+
+def _cache_path(path):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(CACHE_DIR, f'{stem}.parquet')
+
+
+@profiled('read_parquet_cache')
+def _read_cache(cache_path, source_mtime):
+    pa = _parquet()
+    if pa is None or not os.path.exists(cache_path):
+        return None
+    metadata = pa.parquet.read_schema(cache_path).metadata or {}
+    if metadata.get(b'source_mtime_ns') != str(source_mtime).encode():
+        return None
+    return pa.parquet.read_table(cache_path).to_pandas()
+
+
+@profiled('write_parquet_cache')
+def _write_cache(df, cache_path, source_mtime):
+    pa = _parquet()
+    if pa is None:
+        return
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[b'source_mtime_ns'] = str(source_mtime).encode()
+    pa.parquet.write_table(table.replace_schema_metadata(metadata), cache_path)
+
+
+def load_airport(airport, path=None, use_cache=True):
+    """
+    Load one airport's flights, parsed once and cached as Parquet.
+
+    The cache is rebuilt only when the source CSV's mtime changes.
+    """
+    path = path or AIRPORT_FILES[airport]
+    source_mtime = os.stat(path).st_mtime_ns
+    cache_path = _cache_path(path)
+
+    df = _read_cache(cache_path, source_mtime) if use_cache else None
+    if df is None:
+        df = parse_flights(path, airport)
+        if use_cache:
+            _write_cache(df, cache_path, source_mtime)
+    return df
+
+
+def load_airports(airports=None, use_cache=True):
+    """Load several airports into a dict keyed by IATA code (default: every airport with data)"""
+    airports = airports or available_airports()
+    return {airport: load_airport(airport, use_cache=use_cache) for airport in airports}
+
+
+def combine(frames):
+    """Concatenate per-airport frames, keeping the categorical columns categorical"""
+    combined = pd.concat(list(frames), ignore_index=True)
+    for col in ['Airport', 'Carrier', 'Flight Type']:
+        combined[col] = combined[col].astype('category')
+    return combined
+
+
+def load_combined(airports=None, use_cache=True):
+    """Load several airports into one frame with an 'Airport' column"""
+    return combine(load_airports(airports, use_cache).values())
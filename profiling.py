@@ -0,0 +1,194 @@
+import atexit
+import cProfile
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is not recorded
+    resource = None
+
+# Opt-in switches, read once at import so no code has to change to profile a run:
+#   AIRPORT_PROFILE=profile.json          record every stage and write them at exit
+#   AIRPORT_PROFILE_FORMAT=chrome         write a Chrome trace (chrome://tracing, Perfetto) instead of JSON records
+#   AIRPORT_CPROFILE=run.prof             also run cProfile over the process (pstats file for snakeviz / pstats)
+PROFILE_ENV = 'AIRPORT_PROFILE'
+FORMAT_ENV = 'AIRPORT_PROFILE_FORMAT'
+CPROFILE_ENV = 'AIRPORT_CPROFILE'
+OWNER_ENV = 'AIRPORT_PROFILE_OWNER'
+SUMMARY_TOP = 15
+
+OUTPUT_PATH = os.environ.get(PROFILE_ENV) or None
+ENABLED = OUTPUT_PATH is not None
+# Worker processes (eval and vis process pools) inherit the environment; the process that
+# first imported this module writes the output, workers append their stages to a spool file
+if ENABLED or os.environ.get(CPROFILE_ENV):
+    os.environ.setdefault(OWNER_ENV, str(os.getpid()))
+
+_records = []
+_local = threading.local()
+_lock = threading.Lock()
+_origin = time.time()
+
+
+def _peak_rss_mb():
+    """Process high-water RSS so far (ru_maxrss is KB on Linux, bytes on macOS)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+def _is_owner():
+    # Checked per call: forked workers inherit this module's state from the owner
+    return os.environ.get(OWNER_ENV) == str(os.getpid())
+
+
+def _spool_path():
+    return f"{OUTPUT_PATH}.{os.environ[OWNER_ENV]}.spool"
+
+
+@contextmanager
+def stage(name, rows=None, **args):
+    """
+    Time one pipeline stage: wall and process CPU seconds, rows processed and peak RSS.
+
+    Yields the record so the body can fill in 'rows' once it is known.
+    Stages nest; each record keeps its parent's name. Does nothing unless
+    AIRPORT_PROFILE is set.
+    """
+    if not ENABLED:
+        yield {'args': args}
+        return
+
+    stack = _local.__dict__.setdefault('stack', [])
+    record = {'name': name, 'rows': rows, 'parent': stack[-1]['name'] if stack else None, 'depth': len(stack),
+              'pid': os.getpid(), 'tid': threading.get_ident(), 'args': args}
+    stack.append(record)
+    rss_before = _peak_rss_mb()
+    start, cpu_start = time.time(), time.process_time()
+    try:
+        yield record
+    finally:
+        record['start_s'] = round(start - _origin, 6) if _is_owner() else round(start, 6)
+        record['wall_s'] = round(time.time() - start, 6)
+        record['cpu_s'] = round(time.process_time() - cpu_start, 6)
+        record['peak_rss_mb'] = _peak_rss_mb()
+        record['rss_growth_mb'] = None if rss_before is None else round(record['peak_rss_mb'] - rss_before, 2)
+        stack.pop()
+        _save(record)
+
+
+def _save(record):
+    if _is_owner():
+        with _lock:
+            _records.append(record)
+        return
+    # Workers can exit without running atexit, so each stage is appended as soon as it ends
+    with _lock, open(_spool_path(), 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, default=str) + '\n')
+
+
+def _input_rows(args, result):
+    """Rows of the first frame-like positional argument (or {key: frame} dict), else of a sized result"""
+    for value in args:
+        if hasattr(value, 'shape'):
+            return value.shape[0]
+        if isinstance(value, dict) and value and all(hasattr(v, 'shape') for v in value.values()):
+            return sum(v.shape[0] for v in value.values())
+    return len(result) if hasattr(result, '__len__') else None
+
+
+def profiled(name=None, rows=None):
+    """
+    Decorator form of stage(), named after the function by default.
+
+    rows: callable on the result giving the row count; by default the
+    length of the first DataFrame argument (or of the result).
+    """
+    def decorate(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            with stage(label) as record:
+                result = fn(*args, **kwargs)
+                record['rows'] = rows(result) if rows else _input_rows(args, result)
+            return result
+        return wrapper
+    return decorate
+
+
+def records():
+    """Stages recorded so far in this process, plus those spooled by worker processes"""
+    collected = list(_records)
+    if OUTPUT_PATH and os.path.exists(_spool_path()):
+        with open(_spool_path(), encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                record['start_s'] = round(record['start_s'] - _origin, 6)
+                collected.append(record)
+    return sorted(collected, key=lambda r: r['start_s'])
+
+
+def chrome_trace(stages):
+    """Complete ('X') events in the Chrome trace event format, microsecond timestamps"""
+    events = [{
+        'name': r['name'], 'ph': 'X', 'ts': round(r['start_s'] * 1e6), 'dur': round(r['wall_s'] * 1e6),
+        'pid': r['pid'], 'tid': r['tid'],
+        'args': dict(r['args'], rows=r['rows'], cpu_s=r['cpu_s'], peak_rss_mb=r['peak_rss_mb'])
+    } for r in stages]
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def summary(stages, top=SUMMARY_TOP):
+    """Stages grouped by name: calls, total wall/CPU seconds, rows and the highest peak RSS, slowest first"""
+    totals = {}
+    for r in stages:
+        total = totals.setdefault(r['name'], {'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'rows': 0, 'peak_rss_mb': None})
+        total['calls'] += 1
+        total['wall_s'] += r['wall_s']
+        total['cpu_s'] += r['cpu_s']
+        total['rows'] += r['rows'] or 0
+        if r['peak_rss_mb'] is not None:
+            total['peak_rss_mb'] = max(total['peak_rss_mb'] or 0, r['peak_rss_mb'])
+    return sorted(totals.items(), key=lambda item: -item[1]['wall_s'])[:top]
+
+
+def write(path=None, fmt=None):
+    """Write the recorded stages as JSON records or a Chrome trace"""
+    path = path or OUTPUT_PATH
+    fmt = fmt or os.environ.get(FORMAT_ENV, 'json')
+    stages = records()
+    payload = chrome_trace(stages) if fmt == 'chrome' else {'stages': stages, 'summary': dict(summary(stages, None))}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=1, default=str)
+    return stages
+
+
+def _finish():
+    stages = write()
+    if os.path.exists(_spool_path()):
+        os.remove(_spool_path())
+    print(f"\n⏱️ {len(stages)} stages profiled -> {OUTPUT_PATH}", file=sys.stderr)
+    for name, total in summary(stages):
+        rss = '' if total['peak_rss_mb'] is None else f" {total['peak_rss_mb']:9.1f} MB"
+        print(f"   {name:<45} x{total['calls']:<4} {total['wall_s']:8.3f}s wall {total['cpu_s']:8.3f}s cpu "
+              f"{total['rows']:>11,} rows{rss}", file=sys.stderr)
+
+
+if ENABLED and _is_owner():
+    os.makedirs(os.path.dirname(OUTPUT_PATH) or '.', exist_ok=True)
+    atexit.register(_finish)
+
+if os.environ.get(CPROFILE_ENV) and _is_owner():
+    _profiler = cProfile.Profile()
+    _profiler.enable()
+    atexit.register(lambda: (_profiler.disable(), _profiler.dump_stats(os.environ[CPROFILE_ENV])))
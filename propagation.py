@@ -0,0 +1,137 @@
+import pandas as pd
+import numpy as np
+from loader import ensure_time_features
+
+# Rotation linking rules (minutes)
+MIN_TURNAROUND = 30     # an arrival can feed a departure at least this much later
+MAX_TURNAROUND = 240    # ... and at most this much later
+MAX_BLOCK_TIME = 18 * 60  # a departure feeds the same flight number's arrival elsewhere within this window
+
+
+def _movement_table(df):
+    scheduled = df['Scheduled Time (Local)']
+    minutes = (scheduled - pd.Timestamp(0, tz='UTC')) / pd.Timedelta(minutes=1)
+    table = pd.DataFrame({
+        'row': np.arange(len(df)),
+        'Airport': df['Airport'].astype(str).to_numpy(),
+        'Carrier': df['Carrier'].astype(str).to_numpy(),
+        'Flight Number': df['Flight Number'].astype(str).to_numpy(),
+        'Flight Type': df['Flight Type'].astype(str).to_numpy(),
+        'minutes': minutes.to_numpy(dtype=float)
+    })
+    return table[np.isfinite(table['minutes'])]
+
+
+def _forward_match(left, right, left_on, by, tolerance, allow_exact_matches=True):
+    """Next right-hand movement at or after each left key (merge_asof), one-to-one"""
+    right = right[['row', 'minutes'] + by].rename(columns={'row': 'next_row', 'minutes': 'next_minutes'})
+    matched = pd.merge_asof(
+        left.sort_values(left_on), right.sort_values('next_minutes'),
+        left_on=left_on, right_on='next_minutes', by=by, direction='forward',
+        tolerance=tolerance, allow_exact_matches=allow_exact_matches
+    ).dropna(subset=['next_row'])
+    # When several movements claim the same successor, the latest (tightest) one keeps it
+    return matched.sort_values('minutes').drop_duplicates('next_row', keep='last')
+
+
+def link_rotations(df):
+    """
+    Link every movement to the movement it most likely feeds.
+
+    An arrival feeds the same carrier's next departure at the same airport
+    (MIN_TURNAROUND..MAX_TURNAROUND later); a departure feeds the arrival of
+    the same flight number at another airport in the data. Both matches are
+    sorted merge_asof joins, O(N log N) instead of pairwise.
+
+    Returns (successor, slack): positional successor index (-1 if none) and
+    the minutes of buffer on each link before delay is passed on.
+    """
+    table = _movement_table(df)
+    arrivals = table[table['Flight Type'] == 'Arrival']
+    departures = table[table['Flight Type'] == 'Departure']
+
+    successor = np.full(len(df), -1, dtype=np.int64)
+    slack = np.zeros(len(df))
+
+    # Turnarounds: arrival -> same carrier's next departure at the same airport
+    arrivals = arrivals.assign(ready=arrivals['minutes'] + MIN_TURNAROUND)
+    turns = _forward_match(arrivals, departures, 'ready', ['Airport', 'Carrier'],
+                           MAX_TURNAROUND - MIN_TURNAROUND)
+    rows = turns['row'].to_numpy()
+    successor[rows] = turns['next_row'].to_numpy(dtype=np.int64)
+    slack[rows] = turns['next_minutes'].to_numpy() - turns['ready'].to_numpy()
+
+    # Flights: departure -> arrival of the same flight number at another airport (no buffer)
+    legs = _forward_match(departures, arrivals.drop(columns='ready'), 'minutes', ['Flight Number'],
+                          MAX_BLOCK_TIME, allow_exact_matches=False)
+    next_airport = table.set_index('row')['Airport'].reindex(legs['next_row'].to_numpy()).to_numpy()
+    legs = legs[legs['Airport'].to_numpy() != next_airport]
+    successor[legs['row'].to_numpy()] = legs['next_row'].to_numpy(dtype=np.int64)
+
+    return successor, slack
+
+
+def propagate_delays(delays, successor, slack):
+    """
+    Vectorized forward propagation along rotation chains.
+
+    Each flight's own lateness is pushed down its chain, shrinking by the
+    slack of every link it crosses and capped at each successor's observed
+    lateness (a flight cannot pass on more delay than the next one actually
+    had; unknown delays count as 0). All chains advance one hop per numpy
+    step, so the loop runs max-chain-length times regardless of N.
+
+    Returns (downstream, chain_length, inherited): minutes of delay each
+    flight causes downstream, how many flights that delay reaches, and the
+    delay each flight inherits from its predecessor.
+    """
+    own = np.clip(np.nan_to_num(np.asarray(delays, dtype=float)), 0, None)
+    n = len(own)
+    downstream = np.zeros(n)
+    chain_length = np.zeros(n, dtype=np.int64)
+
+    def passed_on(delay, link_slack, following):
+        """Delay reaching each `following` flight (-1: none), capped at what it observed"""
+        return np.where(following >= 0, np.minimum(delay - link_slack, own[following]), 0)
+
+    source = np.arange(n)
+    current = successor.copy()
+    remaining = passed_on(own, slack, current)
+    active = remaining > 0
+    while active.any():
+        source, current, remaining = source[active], current[active], remaining[active]
+        downstream[source] += remaining
+        chain_length[source] += 1
+        following = successor[current]
+        remaining = passed_on(remaining, slack[current], following)
+        current = following
+        active = remaining > 0
+
+    inherited = np.zeros(n)
+    has_successor = successor >= 0
+    inherited[successor[has_successor]] = np.clip(passed_on(own, slack, successor)[has_successor], 0, None)
+    return downstream, chain_length, inherited
+
+
+def delay_propagation(df):
+    """
+    Per-flight cascading-delay metrics aligned with df's index.
+
+    Inherited_Delay is the part of a flight's delay explained by its
+    predecessor, Root_Delay the part it originated itself, and
+    Downstream_Delay the minutes it pushed onto later flights.
+    """
+    df = ensure_time_features(df)
+    successor, slack = link_rotations(df)
+    delays = df['Delay (min)'].to_numpy(dtype=float)
+    downstream, chain_length, inherited = propagate_delays(delays, successor, slack)
+    own = np.clip(np.nan_to_num(delays), 0, None)
+
+    return pd.DataFrame({
+        'Next_Flight': np.where(successor >= 0, df.index.to_numpy()[successor], None),
+        'Link_Slack': np.where(successor >= 0, slack, np.nan),
+        'Inherited_Delay': inherited,
+        'Root_Delay': np.clip(own - inherited, 0, None),
+        'Downstream_Delay': downstream,
+        'Chain_Length': chain_length
+    }, index=df.index)
@@ -0,0 +1,110 @@
+import pandas as pd
+import numpy as np
+from loader import ensure_time_features
+from aggregates import time_buckets
+from delay_model import fit_delay_model, BUCKET_MINUTES
+from airports import REGISTRY
+
+# Declared runway capacity (movements per hour), a hard limit on every slot (floor of capacity * slot length)
+RUNWAY_CAPACITY = {code: info['runway_capacity'] for code, info in REGISTRY.items()}
+
+MAX_SHIFT = 60          # minutes a flight may be moved either way
+SHIFT_PENALTY = 0.05    # cost (delay minutes) per minute moved, so flights only move for a real gain
+MAX_PASSES = 5
+
+
+def reallocate_slots(flights, history, airport, model=None, capacity=None, slot_minutes=BUCKET_MINUTES, max_shift=MAX_SHIFT):
+    """
+    Reassign one day's flights to slots under the airport's runway capacity.
+
+    Expected delay comes from the airport's fitted QueueDelayModel (fitted
+    on history when not given), so moving a flight changes the predicted
+    delay of every slot it leaves or joins. Starting from the current
+    schedule, the excess flights of every slot already over declared
+    capacity are first moved to the cheapest slot with room within
+    +/-max_shift minutes. Then each flight in turn is moved to the slot in
+    that window that lowers total predicted delay (plus a small penalty per
+    minute moved) the most, never into a full slot; passes repeat until
+    nothing moves. Candidate slots are scored together in one vectorized
+    model evaluation.
+
+    Returns (schedule, summary): one row per flight with its old and new
+    scheduled time and predicted delay before/after, and the day's totals.
+    Flights with no slot left within reach get a NaT new time and are
+    listed in summary['unplaced'], so no slot ends over capacity.
+    """
+    flights = ensure_time_features(flights)
+    flights = flights[flights['Scheduled Time (Local)'].notna()]
+    model = model or fit_delay_model(history, airport, slot_minutes)
+    slot_minutes = model.bucket_minutes
+    slot_limit = np.floor((capacity or RUNWAY_CAPACITY[airport]) * slot_minutes / 60)
+    n_slots = model.n_buckets
+    max_steps = max_shift // slot_minutes
+
+    original = time_buckets(flights['Scheduled Time (Local)'], slot_minutes).to_numpy().astype(int)
+    assigned = original.copy()
+    counts = np.bincount(assigned, minlength=n_slots).astype(float)
+    steps = np.arange(-max_steps, max_steps + 1)
+
+    def best_slot(i):
+        """Cheapest slot within +/-max_shift of the flight's original slot that has room, or None"""
+        candidates = original[i] + steps
+        candidates = candidates[(candidates >= 0) & (candidates < n_slots)]
+        candidates = candidates[counts[candidates] + 1 <= slot_limit]
+        if len(candidates) == 0:
+            return None
+        trial = np.repeat(counts[None, :], len(candidates), axis=0)
+        trial[np.arange(len(candidates)), candidates] += 1
+        cost = model.total_delay(trial)
+        cost += SHIFT_PENALTY * np.abs(candidates - original[i]) * slot_minutes
+        return candidates[np.argmin(cost)]
+
+    # 1. Drain slots already over capacity: their excess flights go to the cheapest slot with room
+    placed = np.ones(len(assigned), dtype=bool)
+    order = np.argsort(original, kind='stable')
+    for slot in np.flatnonzero(counts > slot_limit):
+        for i in order[assigned[order] == slot][int(slot_limit):]:
+            counts[slot] -= 1
+            best = best_slot(i)
+            if best is None:
+                placed[i] = False
+                continue
+            assigned[i] = best
+            counts[best] += 1
+
+    # 2. Improvement passes: every move keeps each slot within capacity
+    for _ in range(MAX_PASSES):
+        moved = 0
+        for i in order[placed[order]]:
+            counts[assigned[i]] -= 1
+            best = best_slot(i)
+            moved += best != assigned[i]
+            assigned[i] = best
+            counts[best] += 1
+        if not moved:
+            break
+
+    before = model.predict(np.bincount(original, minlength=n_slots))
+    after = model.predict(counts)
+    shift = np.where(placed, (assigned - original) * slot_minutes, np.nan)
+
+    schedule = pd.DataFrame({
+        'Flight Number': flights['Flight Number'].to_numpy(),
+        'Carrier': flights['Carrier'].to_numpy(),
+        'Flight Type': flights['Flight Type'].to_numpy(),
+        'Scheduled': flights['Scheduled Time (Local)'].to_numpy(),
+        'New Scheduled': flights['Scheduled Time (Local)'] + pd.to_timedelta(shift, unit='min'),
+        'Shift (min)': shift,
+        'Predicted_Delay_Before': before[original],
+        'Predicted_Delay_After': np.where(placed, after[assigned], np.nan)
+    }, index=flights.index)
+
+    summary = {
+        'airport': airport,
+        'flights': len(schedule),
+        'moved': int((placed & (shift != 0)).sum()),
+        'unplaced': schedule.loc[~placed, 'Flight Number'].tolist(),
+        'total_delay_before': float(schedule['Predicted_Delay_Before'].sum()),
+        'total_delay_after': float(schedule['Predicted_Delay_After'].sum())
+    }
+    return schedule, summary
@@ -1,42 +1,258 @@
 import requests
+import argparse
 import csv
+import gzip
+import hashlib
+import json
+import os
 import time
-from datetime import datetime, timedelta
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+from airports import REGISTRY
+from profiling import stage, profiled
 
 API_KEY = "" #redacted
 API_HOST = 'aerodatabox.p.rapidapi.com'
+API_BASE = f"https://{API_HOST}"
 
-AIRPORTS = {
-    'Bengaluru': 'VOBL'
-}
+# City -> ICAO for every registry airport marked for scraping
+AIRPORTS = {info['city']: info['icao'] for info in REGISTRY.values() if info.get('scrape')}
 
 HEADERS = {
     "X-RapidAPI-Key": API_KEY,
     "X-RapidAPI-Host": API_HOST
 }
 
-def fetch_flight_data(icao, date_from, date_to, retries=3):
-    url = f"https://aerodatabox.p.rapidapi.com/flights/airports/icao/{icao}/{date_from}/{date_to}"
-    params = {
-        'direction': 'Both',
-        'withCancelled': 'true',
-        'withCodeshared': 'true',
-        'withCargo': 'true',
-        'withPrivate': 'true'
+QUERY_PARAMS = {
+    'direction': 'Both',
+    'withCancelled': 'true',
+    'withCodeshared': 'true',
+    'withCargo': 'true',
+    'withPrivate': 'true'
+}
+
+# Concurrency and rate limiting (requests per second, burst size)
+MAX_WORKERS = 4
+REQUESTS_PER_SECOND = 1.0
+BURST = 2
+BACKOFF_BASE = 2.0  # seconds, doubled per attempt
+BACKOFF_MAX = 300.0
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Rows are streamed here; finished (ICAO, window) pairs are recorded in the checkpoint
+OUTPUT_CSV = 'indian_airports_flights.csv'
+CHECKPOINT_PATH = 'indian_airports_flights.checkpoint.json'
+
+# Raw responses are cached on disk; windows that ended more than SETTLE_DELAY ago
+# are final and never expire, more recent ones are refetched after RECENT_TTL
+RESPONSE_CACHE_DIR = '.cache/aerodatabox'
+SETTLE_DELAY = timedelta(days=1)
+RECENT_TTL = timedelta(hours=1)
+
+CSV_HEADER = [
+    'Airport Name', 'Flight Type', 'Carrier', 'Flight Number',
+    'Scheduled Departure (Local)', 'Revised Departure (Local)', 'Departure Delay (min)',
+    'Scheduled Arrival (Local)', 'Revised Arrival (Local)', 'Arrival Delay (min)'
+]
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, at most `capacity` stored.
+
+    pause_until() holds every acquire() until a monotonic deadline, so one
+    worker's 429 backs off all of them.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def pause_until(self, until):
+        """Hand out no tokens before monotonic time `until`; at most one is ready when the pause ends"""
+        with self.lock:
+            if until > self.paused_until:
+                self.paused_until = until
+                self.tokens = min(self.tokens, 1)
+                self.updated = until  # no refill while paused
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def make_session(pool_size=MAX_WORKERS):
+    """Session with a connection pool shared by all worker threads"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update(HEADERS)
+    return session
+
+
+def retry_after_seconds(response):
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), or None"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_seconds(attempt):
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def cache_path(icao, date_from, date_to, params=QUERY_PARAMS):
+    """Cache file for one (ICAO, window, query params) request"""
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:10]
+    name = f"{date_from}_{date_to}_{digest}.json.gz".replace(':', '')
+    return os.path.join(RESPONSE_CACHE_DIR, icao, name)
+
+
+def read_cached_response(icao, date_from, date_to, ttl=RECENT_TTL, params=QUERY_PARAMS):
+    """
+    Cached response for a window, or None if missing or expired.
+
+    Pass ttl=None to accept any cached entry (offline replay).
+    """
+    path = cache_path(icao, date_from, date_to, params)
+    if not os.path.exists(path):
+        return None
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        entry = json.load(f)
+    if ttl is not None:
+        settled = datetime.fromisoformat(date_to) + SETTLE_DELAY <= datetime.now()
+        fetched_at = datetime.fromisoformat(entry['fetched_at'])
+        if not settled and datetime.now() - fetched_at > ttl:
+            return None
+    return entry['response']
+
+
+def write_cached_response(icao, date_from, date_to, data, params=QUERY_PARAMS):
+    path = cache_path(icao, date_from, date_to, params)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    entry = {
+        'icao': icao, 'date_from': date_from, 'date_to': date_to, 'params': params,
+        'fetched_at': datetime.now().isoformat(timespec='seconds'), 'response': data
     }
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        json.dump(entry, f)
+    os.replace(tmp_path, path)
+
+
+def fetch_flight_data(icao, date_from, date_to, retries=5, session=None, bucket=None, base_url=API_BASE,
+                      use_cache=True, ttl=RECENT_TTL):
+    if use_cache:
+        cached = read_cached_response(icao, date_from, date_to, ttl)
+        if cached is not None:
+            return cached
+
+    url = f"{base_url}/flights/airports/icao/{icao}/{date_from}/{date_to}"
+    session = session or make_session(1)
     for attempt in range(retries):
-        response = requests.get(url, headers=HEADERS, params=params)
-        if response.status_code == 200:
-            return response.json()
-        elif response.status_code == 429:
-            print(f"Rate limit hit for {icao}. Retrying in 5 minutes...")
-            time.sleep(300)  # 5 minutes
+        if bucket is not None:
+            bucket.acquire()
+        try:
+            with stage('http_get', icao=icao, date_from=date_from) as record:
+                response = session.get(url, params=QUERY_PARAMS, timeout=60)
+                record['args']['status'] = response.status_code
+        except requests.RequestException as e:
+            wait = backoff_seconds(attempt)
+            print(f"Request error for {icao} {date_from}: {e}. Retrying in {wait:.1f}s...")
+            time.sleep(wait)
+            continue
+        if response.status_code in (200, 204):
+            data = response.json() if response.status_code == 200 else {}
+            if use_cache:
+                write_cached_response(icao, date_from, date_to, data)
+            return data
+        elif response.status_code in RETRYABLE_STATUS:
+            retry_after = retry_after_seconds(response)
+            wait = backoff_seconds(attempt) if retry_after is None else retry_after
+            print(f"HTTP {response.status_code} for {icao} {date_from}. Retrying in {wait:.1f}s...")
+            if bucket is not None and (response.status_code == 429 or retry_after is not None):
+                # The origin asked for a pause: hold the shared bucket so every worker waits, not just this one
+                bucket.pause_until(time.monotonic() + wait)
+            else:
+                time.sleep(wait)
         else:
             print(f"Error fetching flights for {icao}: {response.status_code}")
             return None
     print(f"Failed after {retries} retries for {icao}.")
     return None
 
+
+def build_windows(start_date, end_date, interval):
+    """(date_from, date_to) strings covering start..end in `interval` steps"""
+    windows = []
+    current = start_date
+    while current < end_date:
+        interval_end = min(current + interval, end_date)
+        windows.append((current.strftime('%Y-%m-%dT%H:%M'), interval_end.strftime('%Y-%m-%dT%H:%M')))
+        current += interval
+    return windows
+
+
+def fetch_windows(jobs, max_workers=MAX_WORKERS, rate=REQUESTS_PER_SECOND, burst=BURST, base_url=API_BASE,
+                  ttl=RECENT_TTL):
+    """
+    Fetch (airport_name, icao, date_from, date_to) jobs concurrently.
+
+    All workers share one pooled session and one token bucket, so the
+    request rate stays under `rate` per second however many workers run,
+    and a 429 (or Retry-After) pauses all of them until it expires.
+    Cached windows are served without using a token. Yields (job, data)
+    as responses complete.
+    """
+    session = make_session(max_workers)
+    bucket = TokenBucket(rate, burst)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(fetch_flight_data, icao, date_from, date_to,
+                        session=session, bucket=bucket, base_url=base_url, ttl=ttl): (name, icao, date_from, date_to)
+            for name, icao, date_from, date_to in jobs
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def replay_cached(jobs):
+    """Offline counterpart of fetch_windows: serves jobs from the response cache only"""
+    for name, icao, date_from, date_to in jobs:
+        data = read_cached_response(icao, date_from, date_to, ttl=None)
+        if data is None:
+            print(f"No cached response for {icao} {date_from} - {date_to}, skipping")
+        yield (name, icao, date_from, date_to), data
+
 def calculate_delay(scheduled_utc, revised_utc):
     if scheduled_utc and revised_utc:
         try:
@@ -48,91 +264,176 @@ def calculate_delay(scheduled_utc, revised_utc):
             return ''
     return ''
 
-def main():
+
+@profiled('parse_response', rows=len)
+def parse_flights(airport_name, flights_data):
+    """Flatten one AeroDataBox response into CSV rows"""
+    rows = []
+    for category, flights in [('Arrival', flights_data.get('arrivals', [])), ('Departure', flights_data.get('departures', []))]:
+        for flight in flights:
+            try:
+                carrier = flight.get('airline', {}).get('name', '')
+                flight_num = flight.get('number', '')
+
+                # Extract local times and UTC for delay calculation
+                if category == 'Arrival':
+                    arr_data = flight.get('movement', {})
+                    dep_data = flight.get('otherMovement', {}) if 'otherMovement' in flight else {}
+                else:  # Departure
+                    dep_data = flight.get('movement', {})
+                    arr_data = flight.get('otherMovement', {}) if 'otherMovement' in flight else {}
+
+                sched_dep_local = dep_data.get('scheduledTime', {}).get('local', '')
+                revised_dep_local = dep_data.get('revisedTime', {}).get('local', '') or sched_dep_local
+                sched_arr_local = arr_data.get('scheduledTime', {}).get('local', '')
+                revised_arr_local = arr_data.get('revisedTime', {}).get('local', '') or sched_arr_local
+
+                sched_dep_utc = dep_data.get('scheduledTime', {}).get('utc', '')
+                revised_dep_utc = dep_data.get('revisedTime', {}).get('utc', '') or sched_dep_utc
+                sched_arr_utc = arr_data.get('scheduledTime', {}).get('utc', '')
+                revised_arr_utc = arr_data.get('revisedTime', {}).get('utc', '') or sched_arr_utc
+
+                dep_delay = calculate_delay(sched_dep_utc, revised_dep_utc)
+                arr_delay = calculate_delay(sched_arr_utc, revised_arr_utc)
+
+                rows.append([
+                    airport_name, category, carrier, flight_num,
+                    sched_dep_local, revised_dep_local, dep_delay,
+                    sched_arr_local, revised_arr_local, arr_delay
+                ])
+            except Exception as e:
+                print(f"Data error for flight at {airport_name}: {e}")
+    return rows
+
+def row_key(row):
+    """Dedup key: (flight number, scheduled time of the movement, direction)"""
+    scheduled = row[4] if row[1] == 'Departure' else row[7]
+    return (row[3], scheduled, row[1])
+
+
+class FlightCsvWriter:
+    """
+    Append-only CSV writer that flushes after every batch and skips rows
+    already present in the file, so restarted runs never duplicate data.
+    """
+
+    def __init__(self, path=OUTPUT_CSV):
+        self.path = path
+        self.seen = set()
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not is_new:
+            with open(path, newline='', encoding='utf-8') as f:
+                reader = csv.reader(f)
+                next(reader, None)
+                self.seen.update(row_key(row) for row in reader if len(row) == len(CSV_HEADER))
+        self.file = open(path, 'a', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        if is_new:
+            self.writer.writerow(CSV_HEADER)
+
+    def write_rows(self, rows):
+        """Write unseen rows and flush them to disk; returns the number written"""
+        written = 0
+        for row in rows:
+            key = row_key(row)
+            if key in self.seen:
+                continue
+            self.seen.add(key)
+            self.writer.writerow(row)
+            written += 1
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return written
+
+    def close(self):
+        self.file.close()
+
+
+def load_checkpoint(path=CHECKPOINT_PATH):
+    """Set of (icao, date_from, date_to) windows already written"""
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding='utf-8') as f:
+        return {tuple(window) for window in json.load(f)}
+
+
+def save_checkpoint(done, path=CHECKPOINT_PATH):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(sorted(done), f)
+    os.replace(tmp_path, path)  # atomic, a crash never leaves a half-written checkpoint
+
+
+def main(offline=False, output=OUTPUT_CSV, ttl=RECENT_TTL, allow_partial=False):
     end_date = datetime(2025, 8, 22, 23, 59)
     start_date = datetime(2025, 8, 16, 0, 0)
     interval = timedelta(hours=12)
     max_requests_per_run = float('inf')  # Effectively unlimited
     max_rows = float('inf')
 
-    all_rows = []
-    all_rows.append([
-        'Airport Name', 'Flight Type', 'Carrier', 'Flight Number',
-        'Scheduled Departure (Local)', 'Revised Departure (Local)', 'Departure Delay (min)',
-        'Scheduled Arrival (Local)', 'Revised Arrival (Local)', 'Arrival Delay (min)'
-    ])
+    # Offline replay rebuilds the CSV from cached responses and ignores the checkpoint
+    done = set() if offline else load_checkpoint()
+    jobs = [
+        (airport_name, airport_icao, date_from, date_to)
+        for airport_name, airport_icao in AIRPORTS.items()
+        for date_from, date_to in build_windows(start_date, end_date, interval)
+        if (airport_icao, date_from, date_to) not in done
+    ]
+    if len(jobs) > max_requests_per_run:
+        jobs = jobs[:int(max_requests_per_run)]
+    print(f"{len(done)} windows already done, {len(jobs)} to {'replay' if offline else 'fetch'}")
 
     request_count = 0
+    missing_count = 0
     row_count = 0  # Track data rows (excluding header)
 
-    with open('indian_airports_flights_test.csv', 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerows(all_rows)  # Write header immediately
+    results = replay_cached(jobs) if offline else fetch_windows(jobs, ttl=ttl)
+    # Offline replay rebuilds the CSV: rows go to a fresh file that replaces the output once the replay completes
+    target = f"{output}.tmp" if offline else output
+    if offline and os.path.exists(target):
+        os.remove(target)
+    writer = FlightCsvWriter(target)
+    try:
+        for (airport_name, airport_icao, date_from, date_to), flights_data in results:
+            request_count += 1
+            if flights_data is None:
+                missing_count += 1
+                continue  # not checkpointed, retried on the next run
 
-    for airport_name, airport_icao in AIRPORTS.items():
-        current = start_date
-        while current < end_date and request_count < max_requests_per_run and row_count < max_rows:
-            interval_start = current
-            interval_end = min(current + interval, end_date)
-            date_from = interval_start.strftime('%Y-%m-%dT%H:%M')
-            date_to = interval_end.strftime('%Y-%m-%dT%H:%M')
+            rows = parse_flights(airport_name, flights_data)
+            truncated = row_count + len(rows) > max_rows
+            if truncated:
+                rows = rows[:int(max_rows - row_count)]
+            row_count += writer.write_rows(rows)
 
-            flights_data = fetch_flight_data(airport_icao, date_from, date_to)
-            request_count += 1
-            if flights_data:
-                for category, flights in [('Arrival', flights_data.get('arrivals', [])), ('Departure', flights_data.get('departures', []))]:
-                    for flight in flights:
-                        if row_count >= max_rows:
-                            break
-                        try:
-                            carrier = flight.get('airline', {}).get('name', '')
-                            flight_num = flight.get('number', '')
-
-                            # Extract local times and UTC for delay calculation
-                            if category == 'Arrival':
-                                arr_data = flight.get('movement', {})
-                                dep_data = flight.get('otherMovement', {}) if 'otherMovement' in flight else {}
-                            else:  # Departure
-                                dep_data = flight.get('movement', {})
-                                arr_data = flight.get('otherMovement', {}) if 'otherMovement' in flight else {}
-
-                            sched_dep_local = dep_data.get('scheduledTime', {}).get('local', '')
-                            revised_dep_local = dep_data.get('revisedTime', {}).get('local', '') or sched_dep_local
-                            sched_arr_local = arr_data.get('scheduledTime', {}).get('local', '')
-                            revised_arr_local = arr_data.get('revisedTime', {}).get('local', '') or sched_arr_local
-
-                            sched_dep_utc = dep_data.get('scheduledTime', {}).get('utc', '')
-                            revised_dep_utc = dep_data.get('revisedTime', {}).get('utc', '') or sched_dep_utc
-                            sched_arr_utc = arr_data.get('scheduledTime', {}).get('utc', '')
-                            revised_arr_utc = arr_data.get('revisedTime', {}).get('utc', '') or sched_arr_utc
-
-                            dep_delay = calculate_delay(sched_dep_utc, revised_dep_utc)
-                            arr_delay = calculate_delay(sched_arr_utc, revised_arr_utc)
-
-                            row = [
-                                airport_name, category, carrier, flight_num,
-                                sched_dep_local, revised_dep_local, dep_delay,
-                                sched_arr_local, revised_arr_local, arr_delay
-                            ]
-                            all_rows.append(row)
-                            row_count += 1
-                        except Exception as e:
-                            print(f"Data error for flight at {airport_name}: {e}")
-
-            if request_count >= max_requests_per_run or row_count >= max_rows:
+            # Rows are on disk before the window is marked done
+            if not truncated and not offline:
+                done.add((airport_icao, date_from, date_to))
+                save_checkpoint(done)
+
+            if row_count >= max_rows:
                 print(f"Reached test limits (requests: {request_count}, rows: {row_count}). Stopping early.")
                 break
+    finally:
+        writer.close()
+    if offline:
+        # A replay with uncached windows would replace complete data with a partial CSV
+        if missing_count and not allow_partial:
+            os.remove(target)
+            raise RuntimeError(f"{missing_count} of {len(jobs)} windows have no cached response; {output} was left "
+                               f"unchanged (pass --allow-partial to write the partial CSV)")
+        os.replace(target, output)
 
-            #time.sleep(10)  # Delay to respect rate limits (comment out for faster local testing)
-            current += interval
-
-    # Append remaining rows to CSV
-    with open('Bengaluru_airport_data.csv', 'a', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerows(all_rows[1:])  # Skip header since it's already written
-
-    print(f"Total API requests made: {request_count}")
+    print(f"Total {'windows replayed' if offline else 'API requests made'}: {request_count}")
     print(f"Total data rows added: {row_count}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description='Scrape AeroDataBox airport movements into CSV')
+    parser.add_argument('--offline', action='store_true', help='rebuild the CSV from cached responses only, no network')
+    parser.add_argument('--output', default=OUTPUT_CSV, help='CSV file to write')
+    parser.add_argument('--cache-ttl', type=float, default=RECENT_TTL.total_seconds() / 3600,
+                        help='hours before a cached response for a recent window is refetched')
+    parser.add_argument('--allow-partial', action='store_true',
+                        help='with --offline, write the CSV even if some windows are missing from the cache')
+    args = parser.parse_args()
+    main(offline=args.offline, output=args.output, ttl=timedelta(hours=args.cache_ttl), allow_partial=args.allow_partial)
@@ -37,6 +37,9 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Update overview statistics with real data
     updateOverviewStats();
+
+    // Date/carrier/hour filters, when the page is served by the analytics API
+    initializeApiFilters();
     
     // Handle window resize for high DPI support
     window.addEventListener('resize', () => {
@@ -1016,6 +1019,88 @@ async function updateOverviewStats() {
     }
 }
 
+// Filtered views from the local analytics API (python cli.py serve); the panel stays hidden on a static host
+async function initializeApiFilters() {
+    let meta;
+    try {
+        const response = await fetch('/api/meta');
+        if (!response.ok) return;
+        meta = await response.json();
+    } catch (error) {
+        return;
+    }
+
+    const start = document.getElementById('filterStart');
+    const end = document.getElementById('filterEnd');
+    const airport = document.getElementById('filterAirport');
+    const carrier = document.getElementById('filterCarrier');
+    const hourFrom = document.getElementById('filterHourFrom');
+    const hourTo = document.getElementById('filterHourTo');
+    const summaryText = document.getElementById('filterSummary');
+
+    start.min = end.min = start.value = meta.first_date;
+    start.max = end.max = end.value = meta.last_date;
+    meta.airports.forEach(code => airport.add(new Option(code, code)));
+    meta.carriers.forEach(name => carrier.add(new Option(name, name)));
+    document.getElementById('apiFilters').hidden = false;
+
+    let chart = null;
+    async function applyFilters() {
+        const params = new URLSearchParams({
+            start: start.value, end: end.value, hour_from: hourFrom.value, hour_to: hourTo.value
+        });
+        if (airport.value) params.set('airport', airport.value);
+        if (carrier.value) params.set('carrier', carrier.value);
+
+        const [summary, buckets] = await Promise.all([
+            fetch(`/api/summary?${params}`).then(r => r.json()),
+            fetch(`/api/buckets?bucket=60&${params}`).then(r => r.json())
+        ]);
+        if (summary.error || buckets.error) {
+            summaryText.textContent = summary.error || buckets.error;
+            return;
+        }
+
+        // The headline cards follow the filters
+        const format = value => value === null ? '-' : value.toFixed(1);
+        document.getElementById('totalFlights').textContent = summary.flights.toLocaleString();
+        document.getElementById('avgDelay').textContent = format(summary.mean_delay);
+        document.getElementById('ontimeRate').textContent = format(summary.on_time_rate) + '%';
+        summaryText.textContent = `${summary.flights.toLocaleString()} flights, average delay ${format(summary.mean_delay)} min, ` +
+            `${format(summary.on_time_rate)}% on time, ${format(summary.severe_rate)}% severely delayed`;
+
+        if (chart) chart.destroy();
+        chart = new Chart(document.getElementById('filteredHourlyChart').getContext('2d'), {
+            type: 'bar',
+            data: {
+                labels: buckets.bucket_start,
+                datasets: [{
+                    label: 'Flights',
+                    data: buckets.flights,
+                    backgroundColor: 'rgba(102, 126, 234, 0.8)',
+                    yAxisID: 'y'
+                }, {
+                    label: 'Average Delay (min)',
+                    data: buckets.mean_delay,
+                    type: 'line',
+                    borderColor: 'rgba(118, 75, 162, 1)',
+                    yAxisID: 'delay'
+                }]
+            },
+            options: {
+                scales: {
+                    y: { beginAtZero: true, title: { display: true, text: 'Flights' } },
+                    delay: { position: 'right', grid: { drawOnChartArea: false }, title: { display: true, text: 'Minutes' } }
+                }
+            }
+        });
+    }
+
+    document.getElementById('applyFilters').addEventListener('click', () => {
+        applyFilters().catch(error => console.error('Error querying the analytics API:', error));
+    });
+}
+
 // Chatbot Functionality with Simple RAG Pipeline
 function initializeChatbot() {
     const chatbotToggle = document.getElementById('chatbotToggle');
@@ -1029,21 +1114,77 @@ function initializeChatbot() {
     const GROQ_MODEL = 'llama-3.3-70b-versatile';
   
     let contextChunks = [];
+    let contextPostings = new Map();
+    let stopwords = new Set([
+      'the','and','for','are','with','that','this','your','from','was','were','have','has','had','not','but','its','can','will','would','could','a','an','of','to','in','on','at','by','or','as','it','be','is','am','we','our','they','them','their','there','here','than','then','over','under','into','out','about','also','any','all','more','most','some','such','if','so'
+    ]);
   
+    // context.txt and context_index.json are written by chat_context.py: one fact per line,
+    // and BM25 postings (term -> [doc id gaps, weights]) keyed by line number
     async function loadContextChunks() {
       try {
-        const response = await fetch('data/context.txt', { cache: 'no-store' });
+        const [response, indexResponse] = await Promise.all([
+          fetch('data/context.txt', { cache: 'no-store' }),
+          fetch('data/context_index.json', { cache: 'no-store' }).catch(() => null)
+        ]);
         if (!response.ok) {
           contextChunks = [];
+          contextPostings = new Map();
           return;
         }
         const contextText = await response.text();
-        contextChunks = contextText.split(/(?<=[.?!])\s+/).map(s => s.trim()).filter(s => s.length > 0);
+        if (indexResponse && indexResponse.ok) {
+          const index = await indexResponse.json();
+          contextChunks = contextText.replace(/\s+$/, '').split('\n').map(s => s.trim());
+          stopwords = new Set(index.stopwords);
+          contextPostings = decodeIndex(index);
+        } else {
+          contextChunks = contextText.split(/(?<=[.?!])\s+/).map(s => s.trim()).filter(s => s.length > 0);
+          contextPostings = buildPostings(contextChunks);
+        }
       } catch {
         contextChunks = [];
+        contextPostings = new Map();
       }
     }
   
+    function decodeIndex(index) {
+      const postings = new Map();
+      for (const [term, [gaps, weights]] of Object.entries(index.terms)) {
+        const ids = new Int32Array(gaps.length);
+        let id = 0;
+        gaps.forEach((gap, i) => { id += gap; ids[i] = id; });
+        postings.set(term, { ids, weights: Float32Array.from(weights, w => w / index.scale) });
+      }
+      return postings;
+    }
+  
+    // Same BM25 weights as chat_context.py, built once for a context.txt that has no index
+    function buildPostings(chunks, k1 = 1.2, b = 0.75) {
+      const docs = chunks.map(chunk => {
+        const tf = new Map();
+        for (const t of tokenize(chunk)) tf.set(t, (tf.get(t) || 0) + 1);
+        return tf;
+      });
+      const lengths = docs.map(tf => [...tf.values()].reduce((sum, n) => sum + n, 0));
+      const avgLength = lengths.reduce((sum, n) => sum + n, 0) / (docs.length || 1);
+      const docFreq = new Map();
+      docs.forEach(tf => tf.forEach((_, t) => docFreq.set(t, (docFreq.get(t) || 0) + 1)));
+  
+      const postings = new Map();
+      docs.forEach((tf, id) => {
+        const norm = k1 * (1 - b + b * lengths[id] / avgLength);
+        tf.forEach((count, t) => {
+          const n = docFreq.get(t);
+          const idf = Math.log(1 + (docs.length - n + 0.5) / (n + 0.5));
+          if (!postings.has(t)) postings.set(t, { ids: [], weights: [] });
+          postings.get(t).ids.push(id);
+          postings.get(t).weights.push(idf * count * (k1 + 1) / (count + norm));
+        });
+      });
+      return postings;
+    }
+  
     loadContextChunks();
   
     chatbotToggle.addEventListener('click', () => {
@@ -1086,20 +1227,20 @@ function initializeChatbot() {
     });
   
     function tokenize(text) {
-      const stop = new Set([
-        'the','and','for','are','with','that','this','your','from','was','were','have','has','had','not','but','its','can','will','would','could','a','an','of','to','in','on','at','by','or','as','it','be','is','am','we','our','they','them','their','there','here','than','then','over','under','into','out','about','also','any','all','more','most','some','such','if','so'
-      ]);
-      return text.toLowerCase().replace(/[^\w\s]/g, ' ').split(/\s+/).filter(w => w.length > 2 && !stop.has(w));
+      return text.toLowerCase().replace(/[^\w\s]/g, ' ').split(/\s+/).filter(w => w.length > 2 && !stopwords.has(w));
     }
   
+    // BM25 scores from the inverted index: only the query terms' postings are visited
     function scoreChunks(queryTokens, chunks) {
-      return chunks.map(chunk => {
-        const tokens = tokenize(chunk);
-        const set = new Set(tokens);
-        let score = 0;
-        for (const q of queryTokens) if (set.has(q)) score += 1;
-        return { chunk, score };
-      });
+      const scores = new Map();
+      for (const q of new Set(queryTokens)) {
+        const list = contextPostings.get(q);
+        if (!list) continue;
+        for (let i = 0; i < list.ids.length; i++) {
+          scores.set(list.ids[i], (scores.get(list.ids[i]) || 0) + list.weights[i]);
+        }
+      }
+      return [...scores].map(([id, score]) => ({ chunk: chunks[id], score }));
     }
   
     async function generateBotResponseRAG(message, chunks) {
@@ -0,0 +1,402 @@
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import traceback
+from collections import OrderedDict
+from datetime import date
+from urllib.parse import urlsplit, parse_qs, unquote
+import numpy as np
+import pandas as pd
+from loader import load_combined, ensure_time_features
+
+CUBE_BUCKET_MINUTES = 5     # finest time-of-day resolution kept in the cube; queries use multiples of it
+RESPONSE_CACHE_SIZE = 512
+GZIP_MIN_BYTES = 1024
+STATIC_ROOT = os.path.dirname(os.path.abspath(__file__))
+STATIC_FILES = {'/': 'index.html', '/index.html': 'index.html', '/script.js': 'script.js',
+                '/styles.css': 'styles.css', '/dashboard_stats.json': 'dashboard_stats.json',
+                '/data/context.txt': 'data/context.txt', '/data/context_index.json': 'data/context_index.json'}
+EPOCH_DAY = date(1970, 1, 1)
+
+
+class QueryError(ValueError):
+    """Bad query parameters (answered with 400)"""
+
+
+class AggregateCube:
+    """
+    Precomputed flight aggregates for filtered dashboard queries.
+
+    Every level keeps the same mergeable measures (flights, known delays,
+    delay sum and sum of squares, on-time and severe counts):
+
+    - a dense (airport, type, day, hour) array of prefix sums over days, so
+      any date range without a carrier filter is one subtraction whatever
+      the history length (and per-day series are differences of adjacent
+      days). Hour filters are whole hours, so the dense level stays hourly:
+      a 5-minute grain would be 12 times larger for a long history;
+    - sparse per-carrier cells, with and without the 5-minute bucket, for
+      carrier filters, rankings and sub-hour buckets, sorted on one
+      mixed-radix key ending in the day: every filter combination is a set
+      of key ranges found with a single searchsorted, so a query only
+      touches the cells it selects before re-aggregating them with bincount.
+    """
+
+    MEASURES = ['flights', 'known', 'delay_sum', 'delay_sq', 'on_time', 'severe']
+    N_BUCKETS = 1440 // CUBE_BUCKET_MINUTES
+
+    def __init__(self, df):
+        df = ensure_time_features(df)
+        df = df[df['Scheduled Time (Local)'].notna()]
+        scheduled = df['Scheduled Time (Local)']
+        delay = df['Delay (min)']
+        known = delay.notna()
+
+        self.airports = [str(a) for a in df['Airport'].astype('category').cat.categories]
+        self.carriers = [str(c) for c in df['Carrier'].astype('category').cat.categories]
+        self.flight_types = [str(t) for t in df['Flight Type'].astype('category').cat.categories]
+        days = (pd.to_datetime(df['Date']) - pd.Timestamp(EPOCH_DAY)).dt.days.to_numpy()
+        self.first_day = int(days.min()) if len(days) else 0
+        self.n_days = int(days.max()) - self.first_day + 1 if len(days) else 0
+
+        cells = pd.DataFrame({
+            'airport': pd.Categorical(df['Airport'].astype(str), categories=self.airports).codes,
+            'day': days - self.first_day,
+            'carrier': pd.Categorical(df['Carrier'].astype(str), categories=self.carriers).codes,
+            'ftype': pd.Categorical(df['Flight Type'].astype(str), categories=self.flight_types).codes,
+            'bucket': ((scheduled.dt.hour * 60 + scheduled.dt.minute) // CUBE_BUCKET_MINUTES).to_numpy(),
+            'flights': 1,
+            'known': known.astype(int).to_numpy(),
+            'delay_sum': delay.fillna(0).to_numpy(),
+            'delay_sq': (delay.fillna(0) ** 2).to_numpy(),
+            'on_time': (known & (delay <= 15)).astype(int).to_numpy(),
+            'severe': (known & (delay > 60)).astype(int).to_numpy()
+        })
+
+        # 1. Dense carrier-free hourly totals, accumulated over days in place (prefix[:, :, d] sums days < d)
+        cells['hour'] = cells['bucket'] * CUBE_BUCKET_MINUTES // 60
+        dense = cells.groupby(['airport', 'ftype', 'day', 'hour'], sort=False)[self.MEASURES].sum()
+        self.prefix = np.zeros((len(self.airports), len(self.flight_types), self.n_days + 1, 24, len(self.MEASURES)))
+        a, t, d, h = (dense.index.get_level_values(i).to_numpy() for i in range(4))
+        self.prefix[a, t, d + 1, h] = dense.to_numpy()
+        for day in range(2, self.n_days + 1):
+            self.prefix[:, :, day] += self.prefix[:, :, day - 1]
+
+        # 2. Sparse per-carrier cells: 5-minute grain and whole-day grain
+        self.sizes = {'airport': len(self.airports), 'carrier': len(self.carriers),
+                      'ftype': len(self.flight_types), 'bucket': self.N_BUCKETS}
+        self.cells = self._sparse(cells, ['airport', 'carrier', 'ftype', 'bucket'])
+        self.day_cells = self._sparse(cells, ['airport', 'carrier', 'ftype'])
+
+        fingerprint = np.concatenate([[len(df), self.first_day], self.prefix[:, :, -1].sum(axis=(0, 1, 2))])
+        self.version = hashlib.sha1(fingerprint.astype(float).tobytes()).hexdigest()[:16]
+
+    def _sparse(self, cells, keys):
+        grouped = cells.groupby(keys + ['day'], sort=False)[self.MEASURES].sum().reset_index()
+        code = np.zeros(len(grouped), dtype=np.int64)
+        for key in keys:
+            code = code * self.sizes[key] + grouped[key].to_numpy()
+        code = code * self.n_days + grouped['day'].to_numpy()
+        order = np.argsort(code, kind='stable')
+
+        level = {key: grouped[key].to_numpy()[order] for key in keys + ['day']}
+        level['keys'] = keys
+        level['code'] = code[order]
+        level['values'] = np.ascontiguousarray(grouped[self.MEASURES].to_numpy(dtype=float)[order].T)
+        return level
+
+    def _rows(self, level, allowed, d0, d1):
+        """Positions of the cells whose keys are in `allowed` and day in [d0, d1]"""
+        base = np.zeros(1, dtype=np.int64)
+        for key in level['keys']:
+            base = (base[:, None] * self.sizes[key] + np.asarray(allowed[key], dtype=np.int64)[None, :]).ravel()
+        starts = np.searchsorted(level['code'], base * self.n_days + d0)
+        lengths = np.searchsorted(level['code'], base * self.n_days + d1 + 1) - starts
+        # Concatenated aranges: each range's start, shifted back by the rows that precede it
+        return np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+
+    def _codes(self, names, known, what):
+        if not names:
+            return list(range(len(known)))
+        unknown = [n for n in names if n not in known]
+        if unknown:
+            raise QueryError(f'unknown {what} {unknown[0]!r}')
+        return [known.index(n) for n in names]
+
+    def _sums(self, group, airports=None, start=None, end=None, carriers=None, flight_type=None,
+              hour_from=None, hour_to=None):
+        """Measure sums (groups x measures) for one grouping: 'all', 'bucket' (5-minute), 'hour', 'day' or 'carrier'"""
+        airport_codes = self._codes(airports, self.airports, 'airport')
+        type_codes = self._codes([flight_type] if flight_type else None, self.flight_types, 'flight type')
+        carrier_codes = self._codes(carriers, self.carriers, 'carrier') if carriers else None
+        d0, d1 = self._day_range(start, end)
+        hours = np.arange(24)
+        hour_mask = ((hours >= (hour_from or 0)) & (hours <= (23 if hour_to is None else hour_to))).astype(float)
+        bucket_mask = hour_mask[np.arange(self.N_BUCKETS) * CUBE_BUCKET_MINUTES // 60]
+
+        n_groups = {'all': 1, 'bucket': self.N_BUCKETS, 'hour': 24, 'day': max(d1 - d0 + 1, 0),
+                    'carrier': len(self.carriers)}[group]
+        if d1 < d0:
+            return np.zeros((n_groups, len(self.MEASURES)))
+
+        if carrier_codes is None and group in ('all', 'hour', 'day'):
+            a, t = np.ix_(airport_codes, type_codes)
+            if group == 'day':
+                cumulative = np.einsum('atdhm,h->dm', self.prefix[:, :, d0:d1 + 2][a, t], hour_mask)
+                return np.diff(cumulative, axis=0)
+            window = (self.prefix[:, :, d1 + 1] - self.prefix[:, :, d0])[a, t].sum(axis=(0, 1)) * hour_mask[:, None]
+            return window if group == 'hour' else window.sum(axis=0, keepdims=True)
+
+        # Whole-day cells suffice unless buckets are grouped or filtered
+        whole_day = group not in ('bucket', 'hour') and hour_from is None and hour_to is None
+        level = self.day_cells if whole_day else self.cells
+        allowed = {
+            'airport': airport_codes,
+            'carrier': range(len(self.carriers)) if carrier_codes is None else carrier_codes,
+            'ftype': type_codes,
+            'bucket': np.flatnonzero(bucket_mask)
+        }
+        rows = self._rows(level, allowed, d0, d1)
+
+        groups = {
+            'all': lambda: np.zeros(len(rows), dtype=np.int64),
+            'bucket': lambda: level['bucket'][rows],
+            'hour': lambda: level['bucket'][rows] * CUBE_BUCKET_MINUTES // 60,
+            'day': lambda: level['day'][rows] - d0,
+            'carrier': lambda: level['carrier'][rows]
+        }[group]()
+        return np.column_stack([np.bincount(groups, weights=values[rows], minlength=n_groups)
+                                for values in level['values']])
+
+    def _day_range(self, start, end):
+        d0 = (start - EPOCH_DAY).days - self.first_day if start else 0
+        d1 = (end - EPOCH_DAY).days - self.first_day if end else self.n_days - 1
+        return max(d0, 0), min(d1, self.n_days - 1)
+
+    def _date(self, day):
+        return str(date.fromordinal(EPOCH_DAY.toordinal() + self.first_day + day))
+
+    def _stats(self, sums):
+        flights, known, delay_sum, delay_sq, on_time, severe = sums.T
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = delay_sum / known
+            return {
+                'flights': flights.astype(int).tolist(),
+                'mean_delay': _rounded(mean),
+                'std_delay': _rounded(np.sqrt(np.maximum(delay_sq / known - mean ** 2, 0))),
+                'on_time_rate': _rounded(on_time / known * 100),
+                'severe_rate': _rounded(severe / known * 100)
+            }
+
+    def summary(self, **filters):
+        return {key: values[0] for key, values in self._stats(self._sums('all', **filters)).items()}
+
+    def by_bucket(self, bucket_minutes=60, **filters):
+        if bucket_minutes % CUBE_BUCKET_MINUTES or not 0 < bucket_minutes <= 1440 or 1440 % bucket_minutes:
+            raise QueryError(f'bucket must be a multiple of {CUBE_BUCKET_MINUTES} minutes that divides the day')
+        # Whole-hour buckets come from the dense hourly level, finer ones from the 5-minute carrier cells
+        grain = 60 if bucket_minutes % 60 == 0 else CUBE_BUCKET_MINUTES
+        sums = self._sums('hour' if grain == 60 else 'bucket', **filters)
+        sums = sums.reshape(-1, bucket_minutes // grain, len(self.MEASURES)).sum(axis=1)
+        stats = self._stats(sums)
+        stats['bucket_start'] = [f'{m // 60:02d}:{m % 60:02d}' for m in range(0, 1440, bucket_minutes)]
+        return stats
+
+    def by_day(self, **filters):
+        stats = self._stats(self._sums('day', **filters))
+        d0, _ = self._day_range(filters.get('start'), filters.get('end'))
+        stats['date'] = [self._date(d0 + i) for i in range(len(stats['flights']))]
+        return stats
+
+    def by_carrier(self, top=10, **filters):
+        stats = self._stats(self._sums('carrier', **filters))
+        order = np.argsort(stats['flights'], kind='stable')[::-1][:top]
+        return [dict({key: stats[key][i] for key in stats}, carrier=self.carriers[i])
+                for i in order if stats['flights'][i] > 0]
+
+    def meta(self):
+        return {
+            'version': self.version,
+            'airports': self.airports,
+            'carriers': self.carriers,
+            'flight_types': self.flight_types,
+            'first_date': self._date(0),
+            'last_date': self._date(self.n_days - 1),
+            'carrier_cells': len(self.cells['code'])
+        }
+
+
+def _rounded(values):
+    return [None if not np.isfinite(v) else round(float(v), 2) for v in values]
+
+
+def _one(params, name, cast=str):
+    if name not in params:
+        return None
+    try:
+        return cast(params[name][-1])
+    except ValueError:
+        raise QueryError(f'bad value for {name!r}')
+
+
+def run_query(cube, path, params):
+    """Answer one API path from the cube; returns a JSON-serialisable result"""
+    if path == '/api/meta':
+        return cube.meta()
+
+    filters = {
+        'airports': [a for value in params.get('airport', []) for a in value.split(',')] or None,
+        'start': _one(params, 'start', date.fromisoformat),
+        'end': _one(params, 'end', date.fromisoformat),
+        'carriers': [c for value in params.get('carrier', []) for c in value.split(',')] or None,
+        'flight_type': _one(params, 'type'),
+        'hour_from': _one(params, 'hour_from', int),
+        'hour_to': _one(params, 'hour_to', int)
+    }
+    if path == '/api/summary':
+        return cube.summary(**filters)
+    if path == '/api/buckets':
+        return cube.by_bucket(_one(params, 'bucket', int) or 60, **filters)
+    if path == '/api/daily':
+        return cube.by_day(**filters)
+    if path == '/api/carriers':
+        return cube.by_carrier(_one(params, 'top', int) or 10, **filters)
+    return None
+
+
+class AnalyticsServer:
+    """Minimal asyncio HTTP/1.1 server: cube queries with ETag/304 and gzip, plus the dashboard files"""
+
+    def __init__(self, cube):
+        self.cube = cube
+        self.cache = OrderedDict()
+
+    def _cached(self, key, build):
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        entry = build()
+        self.cache[key] = entry
+        if len(self.cache) > RESPONSE_CACHE_SIZE:
+            self.cache.popitem(last=False)
+        return entry
+
+    def _api(self, path, query):
+        params = parse_qs(query)
+        canonical = '&'.join(f'{k}={",".join(v)}' for k, v in sorted(params.items()))
+
+        def build():
+            result = run_query(self.cube, path, params)
+            if result is None:
+                return 404, None, None, None
+            body = json.dumps(result, separators=(',', ':')).encode()
+            etag = '"' + hashlib.sha1(f'{self.cube.version}:{path}?{canonical}'.encode()).hexdigest()[:20] + '"'
+            return 200, body, gzip.compress(body, 6) if len(body) >= GZIP_MIN_BYTES else None, etag
+
+        return self._cached((path, canonical), build)
+
+    def _static(self, path):
+        name = STATIC_FILES.get(path)
+        if name is None:
+            return 404, None, None, None
+        full = os.path.join(STATIC_ROOT, name)
+        if not os.path.exists(full):  # e.g. the chatbot context before `cli.py context` has run
+            return 404, None, None, None
+        mtime = os.stat(full).st_mtime_ns
+
+        def build():
+            with open(full, 'rb') as f:
+                body = f.read()
+            return 200, body, gzip.compress(body, 6) if len(body) >= GZIP_MIN_BYTES else None, f'"{mtime:x}"'
+
+        return self._cached((path, mtime), build)
+
+    def respond(self, method, target, headers):
+        """(status, headers, body) for one request"""
+        url = urlsplit(target)
+        path = unquote(url.path)
+        if method not in ('GET', 'HEAD'):
+            return 405, {}, b''
+        try:
+            if path.startswith('/api/'):
+                status, body, gz, etag = self._api(path, url.query)
+                content_type = 'application/json'
+            else:
+                status, body, gz, etag = self._static(path)
+                content_type = mimetypes.guess_type(STATIC_FILES.get(path, ''))[0] or 'application/octet-stream'
+        except QueryError as e:
+            return 400, {'Content-Type': 'application/json'}, json.dumps({'error': str(e)}).encode()
+        if status != 200:
+            return status, {'Content-Type': 'application/json'}, b'{"error":"not found"}'
+
+        response_headers = {'Content-Type': content_type, 'ETag': etag, 'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+        if headers.get('if-none-match') == etag:
+            return 304, response_headers, b''
+        if gz is not None and 'gzip' in headers.get('accept-encoding', ''):
+            response_headers['Content-Encoding'] = 'gzip'
+            body = gz
+        return status, response_headers, body
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    status, response_headers, body = self.respond(method, target, headers)
+                except Exception:
+                    traceback.print_exc()
+                    status, response_headers, body = 500, {'Content-Type': 'application/json'}, b'{"error":"internal error"}'
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                response_headers.update({
+                    'Content-Length': str(len(body)),
+                    'Access-Control-Allow-Origin': '*',
+                    'Connection': 'keep-alive' if keep_alive else 'close'
+                })
+                head = f'HTTP/1.1 {status} {HTTP_REASONS.get(status, "")}\r\n'
+                head += ''.join(f'{k}: {v}\r\n' for k, v in response_headers.items()) + '\r\n'
+                writer.write(head.encode('latin-1') + (b'' if method == 'HEAD' else body))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+HTTP_REASONS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                500: 'Internal Server Error'}
+
+
+async def serve(host, port, airports=None):
+    cube = AggregateCube(load_combined(airports))
+    app = AnalyticsServer(cube)
+    server = await asyncio.start_server(app.handle, host, port)
+    print(f"🧊 Cube ready: {cube.meta()['carrier_cells']:,} carrier cells, {len(cube.airports)} airports")
+    print(f"🚀 Serving on http://{host}:{port}/ (API under /api/)")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Local analytics API for the dashboard')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--airports', nargs='+', default=None, help='IATA codes (default: every airport with data)')
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.airports))
@@ -0,0 +1,159 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from loader import ensure_time_features, load_combined
+from delay_model import congestion_delay, fit_delay_model
+from scheduler import RUNWAY_CAPACITY, reallocate_slots
+
+MIN_POOL = 30           # delays needed before an (hour, carrier) or hour distribution is used on its own
+BATCH_SIZE = 500        # replications sampled per numpy batch (and per pool task)
+ON_TIME_MINUTES = 15
+
+
+def delay_pools(history, airport, hours, carriers, model=None):
+    """
+    Empirical delay distribution for every flight, flattened for batched sampling.
+
+    Observed delays already contain the runway congestion of their own day,
+    and the simulator queues every movement through the runway again. So
+    the pools hold residual delays: observed delay minus the congestion
+    delay the airport's QueueDelayModel (fitted on history when not given)
+    attributes to the movement's slot. Congestion then comes only from the
+    simulated schedule.
+
+    Each flight draws from its (hour, carrier) history, falling back to the
+    hour and then the whole airport when fewer than MIN_POOL delays exist.
+    Returns (values, offsets, sizes): all pools concatenated, and each
+    flight's start and length within them.
+    """
+    history = ensure_time_features(history)
+    history = history[history['Airport'] == airport]
+    model = model or fit_delay_model(history, airport)
+    residual = history['Delay (min)'].to_numpy(dtype=float) - congestion_delay(history, model)
+    known = ~np.isnan(residual)
+    history = history[known]
+    delays = residual[known]
+    by_hour_carrier = pd.Series(np.arange(len(history))).groupby(
+        [history['Hour'].to_numpy(), history['Carrier'].astype(str).to_numpy()]).agg(list)
+    by_hour = pd.Series(np.arange(len(history))).groupby(history['Hour'].to_numpy()).agg(list)
+
+    pools, pool_ids, keys = [], {}, []
+    for hour, carrier in zip(hours, carriers):
+        rows = by_hour_carrier.get((hour, carrier), [])
+        key = (hour, carrier)
+        if len(rows) < MIN_POOL:
+            rows, key = by_hour.get(hour, []), (hour, None)
+        if len(rows) < MIN_POOL:
+            rows, key = np.arange(len(history)), (None, None)
+        if key not in pool_ids:
+            pool_ids[key] = len(pools)
+            pools.append(delays[rows])
+        keys.append(pool_ids[key])
+
+    sizes = np.array([len(p) for p in pools])
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    keys = np.array(keys)
+    return np.concatenate(pools), offsets[keys], sizes[keys]
+
+
+def runway_times(ready, headway):
+    """
+    Push ready times through a single runway queue, vectorized over replications.
+
+    With movements sorted by ready time, t[i] = max(ready[i], t[i-1] + headway),
+    which unrolls to i*headway + cummax(ready[j] - j*headway).
+    """
+    order = np.argsort(ready, axis=-1, kind='stable')
+    ranked = np.take_along_axis(ready, order, axis=-1)
+    steps = np.arange(ready.shape[-1]) * headway
+    served = np.maximum.accumulate(ranked - steps, axis=-1) + steps
+    times = np.empty_like(served)
+    np.put_along_axis(times, order, served, axis=-1)
+    return times
+
+
+def _simulate_batch(scheduled, values, offsets, sizes, headway, replications, seed):
+    """Sample delays for one batch of replications and return (on-time rate, total delay) per replication"""
+    rng = np.random.default_rng(seed)
+    draws = offsets + (rng.random((replications, len(scheduled))) * sizes).astype(np.int64)
+    ready = scheduled + values[draws]
+    delays = runway_times(ready, headway) - scheduled
+    on_time = (delays <= ON_TIME_MINUTES).mean(axis=1) * 100
+    total = np.clip(delays, 0, None).sum(axis=1)
+    return on_time, total
+
+
+def simulate_schedule(schedule, history, airport, time_column='Scheduled Time (Local)', replications=10000,
+                      capacity=None, seed=0, workers=None, batch_size=BATCH_SIZE, model=None):
+    """
+    Monte Carlo replications of one day's schedule at an airport.
+
+    Every flight's delay is drawn from the empirical (hour, carrier)
+    distribution of residual delays (congestion removed, see delay_pools)
+    for its scheduled slot, then all movements are pushed through the
+    runway at `capacity` movements per hour (declared capacity by default). Replications are split into fixed batches seeded from
+    SeedSequence(seed).spawn, so results do not depend on the worker count;
+    batches run in a process pool.
+
+    Returns a frame with On_Time_Rate (%) and Total_Delay (min) per replication.
+    """
+    schedule = schedule[schedule[time_column].notna()]
+    scheduled_times = schedule[time_column]
+    minutes = ((scheduled_times - scheduled_times.dt.normalize()) / pd.Timedelta(minutes=1)).to_numpy(dtype=float)
+    values, offsets, sizes = delay_pools(history, airport, scheduled_times.dt.hour.to_numpy(),
+                                         schedule['Carrier'].astype(str).to_numpy(), model)
+    headway = 60 / (capacity or RUNWAY_CAPACITY[airport])
+
+    batches = [min(batch_size, replications - start) for start in range(0, replications, batch_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(batches))
+    args = [(minutes, values, offsets, sizes, headway, n, s) for n, s in zip(batches, seeds)]
+
+    if workers == 1:
+        results = [_simulate_batch(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            results = list(pool.map(_simulate_batch, *zip(*args)))
+
+    return pd.DataFrame({
+        'On_Time_Rate': np.concatenate([r[0] for r in results]),
+        'Total_Delay': np.concatenate([r[1] for r in results])
+    })
+
+
+def summarize_simulation(results):
+    """Mean and 5th/50th/95th percentiles of each simulated metric"""
+    return results.describe(percentiles=[0.05, 0.5, 0.95]).loc[['mean', '5%', '50%', '95%']].round(2)
+
+
+def shift_hour(flights, hour, fraction, shift_minutes, seed=0):
+    """Proposal of the form 'move 30% of the 08:00 flights': shift a random fraction of one hour's flights"""
+    flights = ensure_time_features(flights).copy()
+    in_hour = flights.index[flights['Hour'] == hour]
+    chosen = pd.Index(in_hour.to_series().sample(frac=fraction, random_state=seed))
+    flights.loc[chosen, 'Scheduled Time (Local)'] += pd.Timedelta(minutes=shift_minutes)
+    return flights
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Simulate the busiest day before and after slot reallocation')
+    parser.add_argument('--airport', default='DEL')
+    parser.add_argument('--replications', type=int, default=10000)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    df = load_combined()
+    history = df[df['Airport'] == args.airport]
+    day = history[history['Date'] == history['Date'].mode()[0]]
+    model = fit_delay_model(history, args.airport)
+    new_schedule, summary = reallocate_slots(day, history, args.airport, model)
+    if summary['unplaced']:
+        print(f"⚠️ {len(summary['unplaced'])} flights could not be placed within capacity and are left out of the reallocated run")
+
+    for label, column in [('Current', 'Scheduled'), ('Reallocated', 'New Scheduled')]:
+        results = simulate_schedule(new_schedule, history, args.airport, column, args.replications,
+                                    seed=args.seed, workers=args.workers, model=model)
+        print(f"📊 {label} schedule ({args.replications} replications):")
+        print(summarize_simulation(results))
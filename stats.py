@@ -1,32 +1,27 @@
+import os
+from functools import lru_cache
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 
 
-# Load and prepare data
-blore_df = pd.read_csv('data/blore_airport_data.csv')
-delhi_df = pd.read_csv('data/delhi_airport_data.csv')
+from loader import load_combined, AIRPORT_FILES
+from airports import available_airports, airport_label
+from propagation import delay_propagation
+from scheduler import reallocate_slots, MAX_SHIFT
+from dataset import read_flights, HISTORY_COLUMNS
+from timeseries import movement_series, time_of_day_profile
+from profiling import profiled
 
-blore_df['Airport'] = 'BLR'
-delhi_df['Airport'] = 'DEL'
-combined_df = pd.concat([blore_df, delhi_df], ignore_index=True)
-
-# Convert datetime columns
-combined_df['Scheduled Departure (Local)'] = pd.to_datetime(combined_df['Scheduled Departure (Local)'])
-combined_df['Scheduled Arrival (Local)'] = pd.to_datetime(combined_df['Scheduled Arrival (Local)'])
-
-# Extract time features
-combined_df['Hour'] = combined_df['Scheduled Departure (Local)'].dt.hour
-combined_df['Minute'] = combined_df['Scheduled Departure (Local)'].dt.minute
-combined_df['Weekday'] = combined_df['Scheduled Departure (Local)'].dt.weekday
-combined_df['Date'] = combined_df['Scheduled Departure (Local)'].dt.date
+# Weights of the delay and traffic terms in Optimal_Score
+SLOT_WEIGHTS = (0.7, 0.3)
 
 # Model 1: Optimal Time Slot Identification
-def identify_optimal_slots(df):
+@profiled()
+def identify_optimal_slots(df, weights=SLOT_WEIGHTS):
     """Identify optimal takeoff/landing times based on delay patterns"""
     
     # Calculate average delay by hour for each airport
-    hourly_delays = df.groupby(['Airport', 'Hour', 'Flight Type']).agg({
+    hourly_delays = df.groupby(['Airport', 'Hour', 'Flight Type'], observed=True).agg({
         'Departure Delay (min)': 'mean',
         'Arrival Delay (min)': 'mean',
         'Flight Number': 'count'  # Traffic volume
@@ -39,37 +34,109 @@ def identify_optimal_slots(df):
     # Score each time slot (lower delay + reasonable traffic = better)
     hourly_delays['Delay_Score'] = 1 / (hourly_delays['Total_Delay'] + 1)  # Avoid division by zero
     hourly_delays['Traffic_Score'] = 1 / (hourly_delays['Flight_Count'] + 1)
-    hourly_delays['Optimal_Score'] = hourly_delays['Delay_Score'] * 0.7 + hourly_delays['Traffic_Score'] * 0.3
+    hourly_delays['Optimal_Score'] = hourly_delays['Delay_Score'] * weights[0] + hourly_delays['Traffic_Score'] * weights[1]
     
     return hourly_delays
 
-optimal_slots = identify_optimal_slots(combined_df)
+# Top-k and alternative-slot queries over the optimal slot scores
+class SlotScorer:
+    """
+    Slot-scoring service built once per (airports, date range, weights).
+
+    Scores are computed once and kept per airport (and per flight type)
+    sorted best-first, so top-k and alternative-slot queries read the first
+    rows instead of filtering and sorting the frame. Answers are memoized in
+    a bounded LRU cache that is cleared whenever the data is replaced
+    (update) or the source CSVs change on disk (refresh).
+    """
+
+    COLUMNS = ['Hour', 'Flight Type', 'Total_Delay', 'Flight_Count', 'Optimal_Score']
+
+    def __init__(self, df, start_date=None, end_date=None, weights=SLOT_WEIGHTS, cache_size=1024):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.weights = weights
+        self.airports = None
+        self.sources = {}
+        self._top_slots = lru_cache(maxsize=cache_size)(self._compute_top_slots)
+        self._alternatives = lru_cache(maxsize=cache_size)(self._compute_alternatives)
+        self.update(df)
+
+    @classmethod
+    def from_files(cls, airports=None, **kwargs):
+        """Scorer over the airports' CSVs; refresh() reloads them when they change"""
+        airports = airports or available_airports()
+        scorer = cls(load_combined(airports), **kwargs)
+        scorer.airports = airports
+        scorer.sources = scorer._source_mtimes()
+        return scorer
+
+    def _source_mtimes(self):
+        return {airport: os.stat(AIRPORT_FILES[airport]).st_mtime_ns for airport in self.airports or []}
+
+    def update(self, df):
+        """Rebuild the sorted score indexes from new data and invalidate cached answers"""
+        if self.start_date is not None:
+            df = df[df['Date'] >= self.start_date]
+        if self.end_date is not None:
+            df = df[df['Date'] <= self.end_date]
+
+        scores = identify_optimal_slots(df, self.weights)
+        scores = scores.sort_values('Optimal_Score', ascending=False, kind='stable')
+        self._index = {}
+        for airport, airport_scores in scores.groupby('Airport', observed=True):
+            ranked = airport_scores[self.COLUMNS].reset_index(drop=True)
+            self._index[(airport, None)] = ranked
+            for flight_type, typed in ranked.groupby('Flight Type', observed=True):
+                self._index[(airport, flight_type)] = typed.reset_index(drop=True)
+        self._top_slots.cache_clear()
+        self._alternatives.cache_clear()
+
+    def refresh(self):
+        """Reload if any source CSV changed since the last load; returns True when it did"""
+        mtimes = self._source_mtimes()
+        if mtimes == self.sources:
+            return False
+        self.update(load_combined(self.airports))
+        self.sources = mtimes
+        return True
+
+    def _ranked(self, airport, flight_type):
+        return self._index.get((airport, flight_type), pd.DataFrame(columns=self.COLUMNS))
+
+    def _compute_top_slots(self, airport, k, flight_type):
+        return self._ranked(airport, flight_type).head(k)
 
-# Get top optimal slots for each airport
-def get_top_optimal_slots(optimal_df, airport, top_n=5):
-    airport_slots = optimal_df[optimal_df['Airport'] == airport].nlargest(top_n, 'Optimal_Score')
-    return airport_slots[['Hour', 'Flight Type', 'Total_Delay', 'Flight_Count', 'Optimal_Score']]
+    def top_slots(self, airport, k=5, flight_type=None):
+        """Best k (hour, flight type) slots at an airport, optionally for one flight type"""
+        return self._top_slots(airport, k, flight_type).copy()
 
-print("TOP OPTIMAL DEPARTURE SLOTS - BANGALORE:")
-blr_optimal = get_top_optimal_slots(optimal_slots, 'BLR')
-print(blr_optimal)
+    def _compute_alternatives(self, airport, current_hour, n, pool, min_gap):
+        hours = self._ranked(airport, None)['Hour'].to_numpy()[:pool]
+        alternatives = [int(h) for h in hours if abs(h - current_hour) >= min_gap]
+        return tuple(alternatives[:n]) if alternatives else (current_hour - min_gap, current_hour + min_gap)
 
-print("TOP OPTIMAL DEPARTURE SLOTS - DELHI:")
-del_optimal = get_top_optimal_slots(optimal_slots, 'DEL')
-print(del_optimal)
+    def alternative_slots(self, airport, current_hour, n=2, pool=3, min_gap=2):
+        """Up to n of the airport's best `pool` hours at least min_gap hours from current_hour"""
+        return list(self._alternatives(airport, int(current_hour), n, pool, min_gap))
 
+    def cache_info(self):
+        return {'top_slots': self._top_slots.cache_info(), 'alternative_slots': self._alternatives.cache_info()}
+
+
+@profiled()
 def identify_busiest_slots(df):
     """Identify peak traffic periods and congestion hotspots"""
     
     # Hourly traffic analysis
-    hourly_traffic = df.groupby(['Airport', 'Hour', 'Flight Type']).agg({
+    hourly_traffic = df.groupby(['Airport', 'Hour', 'Flight Type'], observed=True).agg({
         'Flight Number': 'count',
         'Departure Delay (min)': 'mean',
         'Arrival Delay (min)': 'mean'
     }).reset_index()
     
     # Identify rush hours (top 20% traffic volume)
-    hourly_traffic['Traffic_Percentile'] = hourly_traffic.groupby('Airport')['Flight Number'].rank(pct=True)
+    hourly_traffic['Traffic_Percentile'] = hourly_traffic.groupby('Airport', observed=True)['Flight Number'].rank(pct=True)
     rush_hours = hourly_traffic[hourly_traffic['Traffic_Percentile'] >= 0.8]
     
     # Calculate congestion index (traffic volume × average delay)
@@ -80,83 +147,47 @@ def identify_busiest_slots(df):
     
     return hourly_traffic, rush_hours
 
-traffic_analysis, rush_periods = identify_busiest_slots(combined_df)
-
-print("🚦 BUSIEST TIME SLOTS:")
-busiest = traffic_analysis.nlargest(10, 'Congestion_Index')[['Airport', 'Hour', 'Flight Type', 'Flight Number', 'Congestion_Index']]
-print(busiest)
-
-# Visualize traffic patterns
-plt.figure(figsize=(15, 6))
-for airport in ['BLR', 'DEL']:
-    airport_data = traffic_analysis[traffic_analysis['Airport'] == airport]
-    hourly_counts = airport_data.groupby('Hour')['Flight Number'].sum()
-    plt.plot(hourly_counts.index, hourly_counts.values, marker='o', label=f'{airport} Traffic', linewidth=2)
-
-plt.title('Hourly Flight Traffic Patterns')
-plt.xlabel('Hour of Day')
-plt.ylabel('Number of Flights')
-plt.legend()
-plt.grid(True, alpha=0.3)
-plt.show()
-
+@profiled()
 def identify_high_impact_flights(df):
     """Identify flights that cause cascading delays and operational disruptions"""
     
-    # Calculate impact score based on multiple factors
     df_analysis = df.copy()
     
-    # Factor 1: Delay magnitude
+    # Delay magnitude of the flight itself
     df_analysis['Delay_Impact'] = np.abs(df_analysis[['Departure Delay (min)', 'Arrival Delay (min)']].max(axis=1))
     
-    # Factor 2: Carrier importance (based on flight frequency)
-    carrier_frequency = df_analysis['Carrier'].value_counts()
-    df_analysis['Carrier_Importance'] = df_analysis['Carrier'].map(carrier_frequency)
+    # Cascading delay along rotation chains (arrival -> same carrier's next departure)
+    df_analysis = df_analysis.join(delay_propagation(df_analysis))
     
-    # Factor 3: Time slot criticality (rush hour = higher impact)
-    df_analysis['Rush_Hour_Impact'] = np.where(
-        df_analysis['Hour'].isin([6, 7, 8, 9, 17, 18, 19, 20, 21]), 2.0, 1.0
-    )
-    
-    # Factor 4: Weekend/weekday impact
-    df_analysis['Weekend_Impact'] = np.where(df_analysis['Weekday'] >= 5, 1.5, 1.0)
-    
-    # Calculate composite impact score
-    df_analysis['Impact_Score'] = (
-        df_analysis['Delay_Impact'] * 0.4 +
-        np.log(df_analysis['Carrier_Importance']) * 0.3 +
-        df_analysis['Rush_Hour_Impact'] * 0.2 +
-        df_analysis['Weekend_Impact'] * 0.1
-    )
+    # Impact = delay the flight originated + delay it pushed onto later flights
+    df_analysis['Impact_Score'] = df_analysis['Root_Delay'] + df_analysis['Downstream_Delay']
     
     return df_analysis
 
-high_impact_df = identify_high_impact_flights(combined_df)
-
-# Get top high-impact flights
-print("TOP HIGH-IMPACT FLIGHTS:")
-high_impact_flights = high_impact_df.nlargest(15, 'Impact_Score')[
-    ['Flight Number', 'Carrier', 'Airport', 'Hour', 'Delay_Impact', 'Impact_Score']
-]
-print(high_impact_flights)
-
-# Analyze high-impact carriers
-print("HIGH-IMPACT CARRIERS:")
-carrier_impact = high_impact_df.groupby('Carrier').agg({
-    'Impact_Score': ['mean', 'sum', 'count']
-}).round(2)
-carrier_impact.columns = ['Avg_Impact', 'Total_Impact', 'Flight_Count']
-carrier_impact = carrier_impact.sort_values('Total_Impact', ascending=False).head(10)
-print(carrier_impact)
+def optimize_schedule(df, target_date, airport='BLR', scorer=None, history_days=None):
+    """
+    Generate optimized schedule recommendations.
 
-def optimize_schedule(df, target_date, airport='BLR'):
-    """Generate optimized schedule recommendations"""
+    With df=None the target day and the airport's history are read from
+    the partitioned dataset: only that airport's partitions (the last
+    history_days days when given) and the columns the delay model and slot
+    scorer use are read.
+    """
     
     # Get current day's flights
-    target_flights = df[
-        (df['Date'] == target_date) & 
-        (df['Airport'] == airport)
-    ].copy()
+    if df is None:
+        target_flights = read_flights([airport], target_date, target_date)
+        if history_days:
+            start = pd.Timestamp(target_date) - pd.Timedelta(days=history_days)
+            history = read_flights([airport], start, target_date, columns=HISTORY_COLUMNS)
+        else:
+            history = read_flights([airport], columns=HISTORY_COLUMNS)
+    else:
+        target_flights = df[
+            (df['Date'] == target_date) & 
+            (df['Airport'] == airport)
+        ].copy()
+        history = df[df['Airport'] == airport]
     
     if len(target_flights) == 0:
         return "No flights found for the specified date and airport"
@@ -164,7 +195,11 @@ def optimize_schedule(df, target_date, airport='BLR'):
     # Optimization recommendations
     recommendations = []
     
-    # 1. Identify problematic time slots
+    # 1. Reassign flights to slots under runway capacity (history of this airport drives expected delay)
+    new_schedule, summary = reallocate_slots(target_flights, history, airport)
+    moved = new_schedule[new_schedule['Shift (min)'].fillna(0) != 0]
+    
+    # 2. Identify problematic time slots
     problematic_slots = target_flights.groupby('Hour').agg({
         'Departure Delay (min)': 'mean',
         'Flight Number': 'count'
@@ -172,17 +207,20 @@ def optimize_schedule(df, target_date, airport='BLR'):
     
     high_delay_slots = problematic_slots[problematic_slots['Departure Delay (min)'] > 30]
     
+    scorer = scorer or SlotScorer(history)
     for hour, data in high_delay_slots.iterrows():
+        moved_out = moved[moved['Scheduled'].dt.hour == hour]
+        targets = sorted(moved_out['New Scheduled'].dt.strftime('%H:%M').unique().tolist())
         recommendations.append({
             'type': 'Schedule Redistribution',
             'hour': hour,
             'issue': f'High average delay: {data["Departure Delay (min)"]:.1f} min',
-            'solution': f'Move {int(data["Flight Number"] * 0.3)} flights to optimal slots: {get_best_alternative_slots(hour)}',
+            'solution': f'Move {len(moved_out)} flights to slots: {targets or scorer.alternative_slots(airport, hour)}',
             'priority': 'High' if data["Departure Delay (min)"] > 60 else 'Medium'
         })
     
-    # 2. Runway utilization optimization
-    runway_utilization = target_flights.groupby('Hour')['Flight Number'].sum()
+    # 3. Runway utilization optimization
+    runway_utilization = target_flights.groupby('Hour')['Flight Number'].count()
     peak_hours = runway_utilization[runway_utilization > runway_utilization.quantile(0.8)].index
     
     for hour in peak_hours:
@@ -194,10 +232,100 @@ def optimize_schedule(df, target_date, airport='BLR'):
             'priority': 'High'
         })
     
+    # 4. The concrete reallocated schedule with predicted delay before/after
+    recommendations.append({
+        'type': 'Slot Reallocation',
+        'hour': None,
+        'issue': f'Predicted total delay: {summary["total_delay_before"]:.0f} min',
+        'solution': f'Move {summary["moved"]} of {summary["flights"]} flights, '
+                    f'predicted total delay {summary["total_delay_after"]:.0f} min'
+                    + (f', {len(summary["unplaced"])} flights need a slot outside the '
+                       f'+/-{MAX_SHIFT} min window: {summary["unplaced"]}' if summary['unplaced'] else ''),
+        'priority': 'High',
+        'schedule': new_schedule
+    })
+    
     return recommendations
 
-def get_best_alternative_slots(current_hour):
-    """Find best alternative time slots"""
-    optimal_hours = optimal_slots.nlargest(3, 'Optimal_Score')['Hour'].tolist()
-    alternatives = [h for h in optimal_hours if abs(h - current_hour) >= 2]
-    return alternatives[:2] if alternatives else [current_hour - 2, current_hour + 2]
+
+def report_optimal_slots(combined_df, airports, top_n=5):
+    scorer = SlotScorer(combined_df)
+    for airport in airports:
+        print(f"TOP OPTIMAL DEPARTURE SLOTS - {airport_label(airport).upper()}:")
+        print(scorer.top_slots(airport, top_n))
+    return scorer
+
+
+def report_busiest_slots(combined_df, airports, plot=False):
+    traffic_analysis, rush_periods = identify_busiest_slots(combined_df)
+
+    print("🚦 BUSIEST TIME SLOTS:")
+    busiest = traffic_analysis.nlargest(10, 'Congestion_Index')[['Airport', 'Hour', 'Flight Type', 'Flight Number', 'Congestion_Index']]
+    print(busiest)
+
+    # Hourly bins hide short banks: average movements per 15-minute slot of the day
+    print("🚦 BUSIEST 15-MINUTE BANKS:")
+    for airport in airports:
+        banks = time_of_day_profile(movement_series(combined_df, airport), 15).nlargest(5, 'Movements')
+        for slot, bank in banks.iterrows():
+            print(f"   {airport} {slot * 15 // 60:02d}:{slot * 15 % 60:02d} - {bank['Movements']:.1f} movements/day, "
+                  f"avg delay {bank['Mean_Delay']:.1f} min")
+
+    if plot:
+        plot_hourly_traffic(traffic_analysis, airports)
+    return traffic_analysis, rush_periods
+
+
+def plot_hourly_traffic(traffic_analysis, airports):
+    """Visualize traffic patterns (matplotlib is only imported when a plot is requested)"""
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(15, 6))
+    for airport in airports:
+        airport_data = traffic_analysis[traffic_analysis['Airport'] == airport]
+        hourly_counts = airport_data.groupby('Hour')['Flight Number'].sum()
+        plt.plot(hourly_counts.index, hourly_counts.values, marker='o', label=f'{airport} Traffic', linewidth=2)
+
+    plt.title('Hourly Flight Traffic Patterns')
+    plt.xlabel('Hour of Day')
+    plt.ylabel('Number of Flights')
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.show()
+
+
+def report_high_impact(combined_df, top_n=15):
+    high_impact_df = identify_high_impact_flights(combined_df)
+
+    # Get top high-impact flights
+    print("TOP HIGH-IMPACT FLIGHTS:")
+    high_impact_flights = high_impact_df.nlargest(top_n, 'Impact_Score')[
+        ['Flight Number', 'Carrier', 'Airport', 'Hour', 'Delay_Impact', 'Downstream_Delay', 'Chain_Length', 'Impact_Score']
+    ]
+    print(high_impact_flights)
+
+    # Analyze high-impact carriers
+    print("HIGH-IMPACT CARRIERS:")
+    carrier_impact = high_impact_df.groupby('Carrier', observed=True).agg({
+        'Impact_Score': ['mean', 'sum', 'count']
+    }).round(2)
+    carrier_impact.columns = ['Avg_Impact', 'Total_Impact', 'Flight_Count']
+    carrier_impact = carrier_impact.sort_values('Total_Impact', ascending=False).head(10)
+    print(carrier_impact)
+    return high_impact_df
+
+
+def main(airports=None, plot=True):
+    """Run the slot, congestion and impact analyses for the registered airports"""
+    airports = airports or available_airports()
+
+    # Load and prepare data (parsed timestamps and Hour/Minute/Weekday/Date come from the shared cache)
+    combined_df = load_combined(airports)
+
+    report_optimal_slots(combined_df, airports)
+    report_busiest_slots(combined_df, airports, plot)
+    report_high_impact(combined_df)
+
+
+if __name__ == "__main__":
+    main()
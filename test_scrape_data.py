@@ -0,0 +1,110 @@
+import json
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+import scrape_data
+
+FLIGHTS = {'departures': [{'number': 'AI 101', 'airline': {'name': 'Air India'}}], 'arrivals': []}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Replies to each path from its scripted (status, headers) list, then with 200 and FLIGHTS"""
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        with self.server.lock:
+            self.server.requests.append((path, time.monotonic()))
+            script = self.server.script.get(path, [])
+            status, headers = script.pop(0) if script else (200, {})
+        body = json.dumps(FLIGHTS).encode() if status == 200 else b'{}'
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FetcherTest(unittest.TestCase):
+    """fetch_flight_data / fetch_windows against a local stub of the AeroDataBox endpoint"""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.script = {}
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+        self.cache_dir = tempfile.mkdtemp()
+        self.saved = scrape_data.RESPONSE_CACHE_DIR, scrape_data.BACKOFF_BASE
+        scrape_data.RESPONSE_CACHE_DIR = self.cache_dir
+        scrape_data.BACKOFF_BASE = 0.01
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        scrape_data.RESPONSE_CACHE_DIR, scrape_data.BACKOFF_BASE = self.saved
+        shutil.rmtree(self.cache_dir)
+
+    def script(self, icao, date_from, date_to, *responses):
+        self.server.script[f"/flights/airports/icao/{icao}/{date_from}/{date_to}"] = list(responses)
+
+    def fetch(self, icao, date_from='2025-08-16T00:00', date_to='2025-08-16T12:00', **kwargs):
+        return scrape_data.fetch_flight_data(icao, date_from, date_to, base_url=self.base_url, **kwargs)
+
+    def test_ok_response_is_returned_and_cached(self):
+        self.assertEqual(self.fetch('VOBL'), FLIGHTS)
+        self.assertEqual(self.fetch('VOBL'), FLIGHTS)
+        self.assertEqual(len(self.server.requests), 1)  # the second call is a cache hit
+
+    def test_cache_is_bypassed_when_disabled(self):
+        self.fetch('VOBL', use_cache=False)
+        self.fetch('VOBL', use_cache=False)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_429_waits_for_retry_after(self):
+        self.script('VOBL', '2025-08-16T00:00', '2025-08-16T12:00', (429, {'Retry-After': '0.3'}))
+        bucket = scrape_data.TokenBucket(100, 2)
+        self.assertEqual(self.fetch('VOBL', bucket=bucket), FLIGHTS)
+        (_, first), (_, second) = self.server.requests
+        self.assertGreaterEqual(second - first, 0.3)
+
+    def test_429_pauses_every_worker(self):
+        self.script('VOBL', '2025-08-16T00:00', '2025-08-16T12:00', (429, {'Retry-After': '0.5'}))
+        jobs = [('Bengaluru', 'VOBL', '2025-08-16T00:00', '2025-08-16T12:00'),
+                ('Bengaluru', 'VOBL', '2025-08-16T12:00', '2025-08-17T00:00')]
+        results = dict(scrape_data.fetch_windows(jobs, max_workers=2, rate=10, burst=1, base_url=self.base_url))
+        self.assertEqual(list(results.values()), [FLIGHTS, FLIGHTS])
+
+        # The other worker's request is held until the pause ends, not only the retry
+        paused_at = self.server.requests[0][1]
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertTrue(all(t - paused_at >= 0.5 for _, t in self.server.requests[1:]))
+
+    def test_5xx_backs_off_and_retries(self):
+        self.script('VOBL', '2025-08-16T00:00', '2025-08-16T12:00', (503, {}), (502, {}))
+        self.assertEqual(self.fetch('VOBL', retries=3), FLIGHTS)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_gives_up_after_retries(self):
+        self.script('VOBL', '2025-08-16T00:00', '2025-08-16T12:00', (500, {}), (500, {}))
+        self.assertIsNone(self.fetch('VOBL', retries=2))
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_client_error_is_not_retried(self):
+        self.script('VOBL', '2025-08-16T00:00', '2025-08-16T12:00', (404, {}))
+        self.assertIsNone(self.fetch('VOBL'))
+        self.assertEqual(len(self.server.requests), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
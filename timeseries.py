@@ -0,0 +1,116 @@
+import pandas as pd
+import numpy as np
+from loader import ensure_time_features
+
+ON_TIME_MINUTES = 15
+EPOCH = pd.Timestamp(0, tz='UTC')
+
+
+def movement_series(df, airport=None):
+    """Movements sorted on a DatetimeIndex of scheduled time, optionally for one airport"""
+    df = ensure_time_features(df)
+    if airport is not None:
+        df = df[df['Airport'] == airport]
+    df = df[df['Scheduled Time (Local)'].notna()]
+    table = pd.DataFrame({
+        'Airport': df['Airport'].to_numpy(),
+        'Carrier': df['Carrier'].to_numpy(),
+        'Flight Number': df['Flight Number'].to_numpy(),
+        'Flight Type': df['Flight Type'].to_numpy(),
+        'Delay': df['Delay (min)'].to_numpy(dtype=float)
+    }, index=pd.DatetimeIndex(df['Scheduled Time (Local)'], name='Scheduled'))
+    return table.sort_index(kind='stable')
+
+
+def _minutes(times):
+    return ((times - EPOCH) / pd.Timedelta(minutes=1)).to_numpy(dtype=float)
+
+
+def _timestamps(minutes, tz):
+    return (EPOCH + pd.to_timedelta(minutes, unit='min')).tz_convert(tz)
+
+
+def _local_offset(table):
+    """UTC offset of the table's local time in minutes, so grids can start on local hours and quarter-hours"""
+    return (table.index[0].utcoffset() or pd.Timedelta(0)) / pd.Timedelta(minutes=1)
+
+
+def window_stats(table, starts, ends, side='left'):
+    """
+    Movement count and delay stats for arbitrary windows in O(log N) each.
+
+    starts/ends are minutes since the epoch; side='left' counts [start, end),
+    side='right' counts (start, end]. Every statistic is a difference of
+    prefix sums located with searchsorted, so no per-window groupby runs.
+    """
+    minutes = _minutes(table.index)
+    delay = table['Delay'].to_numpy()
+    known = ~np.isnan(delay)
+
+    def prefix(values):
+        return np.concatenate([[0], np.cumsum(values)])
+
+    cum_known = prefix(known)
+    cum_delay = prefix(np.where(known, delay, 0))
+    cum_late = prefix(known & (delay > ON_TIME_MINUTES))
+
+    left = np.searchsorted(minutes, starts, side=side)
+    right = np.searchsorted(minutes, ends, side=side)
+    n_known = cum_known[right] - cum_known[left]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return pd.DataFrame({
+            'Movements': right - left,
+            'Mean_Delay': (cum_delay[right] - cum_delay[left]) / n_known,
+            'Late_Rate': (cum_late[right] - cum_late[left]) / n_known * 100
+        })
+
+
+def bucket_stats(table, bucket_minutes=15):
+    """Counts and delay stats per fixed bucket of local time over the whole timeline, empty buckets included"""
+    minutes = _minutes(table.index)
+    if len(minutes) == 0:
+        return pd.DataFrame(columns=['Movements', 'Mean_Delay', 'Late_Rate'])
+    # Floor in local wall-clock minutes so buckets start on local hours and quarter-hours
+    offset = _local_offset(table)
+    first = np.floor((minutes[0] + offset) / bucket_minutes) * bucket_minutes - offset
+    starts = np.arange(first, minutes[-1] + 1, bucket_minutes)
+    stats = window_stats(table, starts, starts + bucket_minutes)
+    stats.index = pd.DatetimeIndex(_timestamps(starts, table.index.tz), name='Bucket')
+    return stats
+
+
+def rolling_stats(table, window_minutes=60, step_minutes=None):
+    """
+    Trailing-window stats, e.g. movements in any trailing 60 minutes.
+
+    Evaluated at every movement (window ending at and including it) or, with
+    step_minutes, on a regular grid of window end times aligned to local
+    time like bucket_stats.
+    """
+    minutes = _minutes(table.index)
+    if step_minutes is None:
+        ends = minutes
+    else:
+        offset = _local_offset(table)
+        first = np.ceil((minutes[0] + offset) / step_minutes) * step_minutes - offset
+        ends = np.arange(first, minutes[-1] + step_minutes, step_minutes)
+    stats = window_stats(table, ends - window_minutes, ends, side='right')
+    stats.index = pd.DatetimeIndex(_timestamps(ends, table.index.tz), name='Window_End')
+    return stats
+
+
+def peak_window(table, window_minutes=60):
+    """Busiest trailing window: (start, end, movements)"""
+    if len(table) == 0:
+        return None, None, 0
+    counts = rolling_stats(table, window_minutes)['Movements']
+    end = counts.idxmax()
+    return end - pd.Timedelta(minutes=window_minutes), end, int(counts.max())
+
+
+def time_of_day_profile(table, bucket_minutes=15):
+    """Average movements and delay per bucket of the day across all days in the table"""
+    stats = bucket_stats(table, bucket_minutes)
+    minute_of_day = stats.index.hour * 60 + stats.index.minute
+    stats['Slot'] = minute_of_day // bucket_minutes
+    return stats.groupby('Slot').agg({'Movements': 'mean', 'Mean_Delay': 'mean', 'Late_Rate': 'mean'})
@@ -1,364 +1,376 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
 import warnings
 import os
+from loader import load_airports, ensure_time_features, combine
+from airports import REGISTRY, airport_label, airport_slug
+from aggregates import heatmap_matrix, carrier_kpis
+from profiling import stage, profiled
 warnings.filterwarnings('ignore')
 
-# Create the plots folder if it doesn't exist
-if not os.path.exists('plots'):
-    os.makedirs('plots')
+PLOTS_DIR = 'plots'
+CHART_DATA_DIR = 'plots/data'
 
-# Set style for better-looking plots
-plt.style.use('seaborn-v0_8')
-sns.set_palette("husl")
+# matplotlib/seaborn are imported on first render, so computing chart data never loads them
+plt = None
+sns = None
 
-def create_individual_visualizations(blore_df, delhi_df):
+
+def _load_plotting():
+    global plt, sns
+    if plt is None:
+        import matplotlib.pyplot
+        import seaborn
+        plt, sns = matplotlib.pyplot, seaborn
+
+        # Set style for better-looking plots
+        plt.style.use('seaborn-v0_8')
+        sns.set_palette("husl")
+
+
+@profiled()
+def chart_series(frames):
     """
-    Create comprehensive visualizations and save each plot individually
+    Compute the data series behind each plot, keyed by plot name.
+
+    frames maps IATA code -> flights; comparison plots carry one entry per
+    airport (label and color from the registry), per-airport plots get one
+    series each, named after the airport.
     """
-    
+    if not frames:
+        raise ValueError('no airport frames to chart')
+    frames = {code: ensure_time_features(df) for code, df in frames.items()}
+    codes = list(frames)
+    names = [airport_label(code) for code in codes]
+    colors = [REGISTRY[code]['color'] for code in codes]
+    series = {}
+
+    def comparison(values, **extra):
+        return dict(extra, airports=names, colors=colors, values=values)
+
     # 1. Flight Volume Comparison
+    series['01_flight_volume_comparison'] = comparison([len(df) for df in frames.values()])
+
+    # 2. Flight Type Distribution (one pie per airport)
+    for code, df in frames.items():
+        flight_types = df['Flight Type'].value_counts()
+        series[f'02_{airport_slug(code)}_flight_type_distribution'] = {
+            'title': f'{airport_label(code)}: Flight Type Distribution',
+            'colors': REGISTRY[code]['type_colors'],
+            'labels': flight_types.index.tolist(),
+            'counts': flight_types.tolist()
+        }
+
+    # 3. Delay Distribution Comparison (outliers outside -60..180 filtered out)
+    distributions = []
+    for df in frames.values():
+        all_delays = pd.concat([
+            df['Departure Delay (min)'].dropna(),
+            df['Arrival Delay (min)'].dropna()
+        ])
+        filtered = all_delays[(all_delays >= -60) & (all_delays <= 180)]
+        density, edges = np.histogram(filtered, bins=30, density=True)
+        distributions.append({'edges': edges.tolist(), 'density': density.tolist()})
+    series['03_delay_distribution_comparison'] = comparison(distributions)
+
+    # 4. Top Airlines by Flight Count (one chart per airport)
+    for code, df in frames.items():
+        top_airlines = df['Carrier'].value_counts().head(8)
+        series[f'04_{airport_slug(code)}_top_airlines'] = {
+            'title': f'{airport_label(code)}: Top Airlines',
+            'color': REGISTRY[code]['color'],
+            'carriers': top_airlines.index.tolist(),
+            'flights': top_airlines.tolist()
+        }
+
+    # 5. Hourly Traffic Pattern - histogram straight from the parsed movement hours
+    series['05_hourly_traffic_pattern'] = comparison([
+        np.bincount(df['Hour'].dropna().astype(int), minlength=24).tolist() for df in frames.values()
+    ])
+
+    # 6. On-Time Performance Comparison
+    def calculate_punctuality(df):
+        dep_delays = df[df['Flight Type'] == 'Departure']['Departure Delay (min)'].dropna()
+        arr_delays = df[df['Flight Type'] == 'Arrival']['Arrival Delay (min)'].dropna()
+
+        dep_ontime = (dep_delays <= 15).sum() / len(dep_delays) * 100 if len(dep_delays) > 0 else 0
+        arr_ontime = (arr_delays <= 15).sum() / len(arr_delays) * 100 if len(arr_delays) > 0 else 0
+
+        return [float(dep_ontime), float(arr_ontime)]
+
+    series['06_ontime_performance_comparison'] = comparison(
+        [calculate_punctuality(df) for df in frames.values()],
+        metrics=['Departure\nOn-Time', 'Arrival\nOn-Time'])
+
+    # 7. Average Delay by Carrier (Top 6 across all airports)
+    combined = combine(frames.values())
+    top = carrier_kpis(combined, by=('Carrier',)).nlargest(6, 'Flights')
+    series['07_average_delay_by_carrier'] = {
+        'carriers': top.index.tolist(),
+        'delays': top['Mean_Delay'].fillna(0).tolist()
+    }
+
+    # 8. Delay Heatmap - one groupby over the melted (hour, delay) frame of all airports
+    heatmap_data = heatmap_matrix(combined, codes)
+    series['08_delay_heatmap_by_hour'] = {
+        'airports': names,
+        'hours': list(range(24)),
+        'delays': heatmap_data.to_numpy().tolist()
+    }
+
+    # 9. Severe Delay Analysis
+    def severe_delay_analysis(df):
+        all_delays = pd.concat([
+            df['Departure Delay (min)'].dropna(),
+            df['Arrival Delay (min)'].dropna()
+        ])
+
+        on_time = (all_delays <= 15).sum()
+        minor = ((all_delays > 15) & (all_delays <= 60)).sum()
+        major = ((all_delays > 60) & (all_delays <= 120)).sum()
+        severe = (all_delays > 120).sum()
+
+        return [int(on_time), int(minor), int(major), int(severe)]
+
+    series['09_delay_severity_distribution'] = comparison(
+        [severe_delay_analysis(df) for df in frames.values()],
+        categories=['On-Time\n(≤15 min)', 'Minor Delay\n(16-60 min)', 'Major Delay\n(61-120 min)', 'Severe Delay\n(>120 min)'])
+
+    # 10. Daily Flight Volume Trend
+    trends = []
+    for df in frames.values():
+        date_counts = df['Date'].value_counts().sort_index()
+        trends.append({'dates': [str(d) for d in date_counts.index], 'flights': date_counts.tolist()})
+    series['10_daily_flight_volume_trend'] = comparison(trends)
+
+    return series
+
+
+def write_chart_data(series, out_dir=CHART_DATA_DIR):
+    """Write each plot's series as a compact JSON file"""
+    os.makedirs(out_dir, exist_ok=True)
+    for name, data in series.items():
+        with open(os.path.join(out_dir, f'{name}.json'), 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'), ensure_ascii=False)
+
+
+def _grouped_bars(data, labels):
+    """One bar per airport in every group; returns group positions, bar width and per-airport offsets"""
+    x = np.arange(len(labels))
+    width = 0.7 / len(data['airports'])
+    offsets = (np.arange(len(data['airports'])) - (len(data['airports']) - 1) / 2) * width
+    for offset, name, color, values in zip(offsets, data['airports'], data['colors'], data['values']):
+        plt.bar(x + offset, values, width, label=name, alpha=0.8, color=color)
+    return x, width, offsets
+
+
+def _plot_flight_volume(data):
     plt.figure(figsize=(10, 6))
-    airports = ['Bangalore', 'Delhi']
-    flight_counts = [len(blore_df), len(delhi_df)]
-    colors = ['#FF6B6B', '#4ECDC4']
-    
-    bars = plt.bar(airports, flight_counts, color=colors, alpha=0.8, edgecolor='black', linewidth=1)
+
+    bars = plt.bar(data['airports'], data['values'], color=data['colors'], alpha=0.8, edgecolor='black', linewidth=1)
     plt.title('Total Flight Volume Comparison', fontsize=14, fontweight='bold')
     plt.ylabel('Number of Flights')
-    
+
     # Add value labels on bars
-    for bar, count in zip(bars, flight_counts):
-        plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 50, 
+    for bar, count in zip(bars, data['values']):
+        plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 50,
                 f'{count:,}', ha='center', va='bottom', fontweight='bold')
-    
+
     plt.tight_layout()
-    plt.savefig('plots/01_flight_volume_comparison.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    
-    # 2. Flight Type Distribution - Bangalore
-    plt.figure(figsize=(8, 6))
-    blore_flight_types = blore_df['Flight Type'].value_counts()
-    plt.pie(blore_flight_types.values, labels=blore_flight_types.index, autopct='%1.1f%%', 
-            colors=['#FF9999', '#66B2FF'], startangle=90)
-    plt.title('Bangalore: Flight Type Distribution', fontsize=12, fontweight='bold')
-    plt.savefig('plots/02_bangalore_flight_type_distribution.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    
-    # 3. Flight Type Distribution - Delhi
+
+
+def _plot_flight_types(data):
     plt.figure(figsize=(8, 6))
-    delhi_flight_types = delhi_df['Flight Type'].value_counts()
-    plt.pie(delhi_flight_types.values, labels=delhi_flight_types.index, autopct='%1.1f%%', 
-            colors=['#FFB366', '#66FFB2'], startangle=90)
-    plt.title('Delhi: Flight Type Distribution', fontsize=12, fontweight='bold')
-    plt.savefig('plots/03_delhi_flight_type_distribution.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    
-    # 4. Delay Distribution Comparison
+    plt.pie(data['counts'], labels=data['labels'], autopct='%1.1f%%',
+            colors=data['colors'], startangle=90)
+    plt.title(data['title'], fontsize=12, fontweight='bold')
+
+
+def _plot_delay_distribution(data):
     plt.figure(figsize=(12, 6))
-    
-    # Combine all delays for both airports
-    blore_all_delays = pd.concat([
-        blore_df['Departure Delay (min)'].dropna(),
-        blore_df['Arrival Delay (min)'].dropna()
-    ])
-    
-    delhi_all_delays = pd.concat([
-        delhi_df['Departure Delay (min)'].dropna(),
-        delhi_df['Arrival Delay (min)'].dropna()
-    ])
-    
-    # Filter extreme outliers for better visualization
-    blore_delays_filtered = blore_all_delays[(blore_all_delays >= -60) & (blore_all_delays <= 180)]
-    delhi_delays_filtered = delhi_all_delays[(delhi_all_delays >= -60) & (delhi_all_delays <= 180)]
-    
-    plt.hist(blore_delays_filtered, bins=30, alpha=0.7, label='Bangalore', color='#FF6B6B', density=True)
-    plt.hist(delhi_delays_filtered, bins=30, alpha=0.7, label='Delhi', color='#4ECDC4', density=True)
+    for name, color, hist in zip(data['airports'], data['colors'], data['values']):
+        edges = hist['edges']
+        plt.hist(edges[:-1], bins=edges, weights=hist['density'], alpha=0.7, label=name, color=color)
     plt.xlabel('Delay (minutes)')
     plt.ylabel('Density')
     plt.title('Delay Distribution Comparison', fontsize=12, fontweight='bold')
     plt.legend()
     plt.axvline(x=0, color='black', linestyle='--', alpha=0.5)
     plt.tight_layout()
-    plt.savefig('plots/04_delay_distribution_comparison.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    
-    # 5. Top Airlines by Flight Count - Bangalore
-    plt.figure(figsize=(10, 8))
-    top_airlines_blore = blore_df['Carrier'].value_counts().head(8)
-    plt.barh(range(len(top_airlines_blore)), top_airlines_blore.values, color='#FF6B6B', alpha=0.8)
-    plt.yticks(range(len(top_airlines_blore)), top_airlines_blore.index)
-    plt.xlabel('Number of Flights')
-    plt.title('Bangalore: Top Airlines', fontsize=12, fontweight='bold')
-    plt.gca().invert_yaxis()
-    plt.tight_layout()
-    plt.savefig('plots/05_bangalore_top_airlines.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    
-    # 6. Top Airlines by Flight Count - Delhi
+
+
+def _plot_top_airlines(data):
     plt.figure(figsize=(10, 8))
-    top_airlines_delhi = delhi_df['Carrier'].value_counts().head(8)
-    plt.barh(range(len(top_airlines_delhi)), top_airlines_delhi.values, color='#4ECDC4', alpha=0.8)
-    plt.yticks(range(len(top_airlines_delhi)), top_airlines_delhi.index)
+    plt.barh(range(len(data['carriers'])), data['flights'], color=data['color'], alpha=0.8)
+    plt.yticks(range(len(data['carriers'])), data['carriers'])
     plt.xlabel('Number of Flights')
-    plt.title('Delhi: Top Airlines', fontsize=12, fontweight='bold')
+    plt.title(data['title'], fontsize=12, fontweight='bold')
     plt.gca().invert_yaxis()
     plt.tight_layout()
-    plt.savefig('plots/06_delhi_top_airlines.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    
-    # 7. Hourly Traffic Pattern - Combined
+
+
+def _plot_hourly_traffic(data):
     plt.figure(figsize=(14, 6))
-    
-    def extract_hour_safe(time_str):
-        if pd.isna(time_str):
-            return None
-        try:
-            return pd.to_datetime(time_str).hour
-        except:
-            return None
-    
-    # Extract hours for all flights
-    blore_hours = []
-    delhi_hours = []
-    
-    for df, hours_list in [(blore_df, blore_hours), (delhi_df, delhi_hours)]:
-        for col in ['Scheduled Departure (Local)', 'Scheduled Arrival (Local)']:
-            hours = df[col].dropna().apply(extract_hour_safe).dropna()
-            hours_list.extend(hours.tolist())
-    
-    # Create hourly distribution
-    hours_range = range(24)
-    blore_hourly = [blore_hours.count(h) for h in hours_range]
-    delhi_hourly = [delhi_hours.count(h) for h in hours_range]
-    
-    x = np.arange(24)
-    width = 0.35
-    
-    plt.bar(x - width/2, blore_hourly, width, label='Bangalore', alpha=0.8, color='#FF6B6B')
-    plt.bar(x + width/2, delhi_hourly, width, label='Delhi', alpha=0.8, color='#4ECDC4')
-    
+    _grouped_bars(data, range(24))
     plt.xlabel('Hour of Day')
     plt.ylabel('Number of Flights')
     plt.title('Hourly Traffic Pattern', fontsize=12, fontweight='bold')
     plt.legend()
     plt.xticks(range(0, 24, 3))
     plt.tight_layout()
-    plt.savefig('plots/07_hourly_traffic_pattern.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    
-    # 8. On-Time Performance Comparison
+
+
+def _plot_ontime_performance(data):
     plt.figure(figsize=(10, 6))
-    
-    # Calculate on-time performance
-    def calculate_punctuality(df):
-        dep_delays = df[df['Flight Type'] == 'Departure']['Departure Delay (min)'].dropna()
-        arr_delays = df[df['Flight Type'] == 'Arrival']['Arrival Delay (min)'].dropna()
-        
-        dep_ontime = (dep_delays <= 15).sum() / len(dep_delays) * 100 if len(dep_delays) > 0 else 0
-        arr_ontime = (arr_delays <= 15).sum() / len(arr_delays) * 100 if len(arr_delays) > 0 else 0
-        
-        return dep_ontime, arr_ontime
-    
-    blore_dep_ot, blore_arr_ot = calculate_punctuality(blore_df)
-    delhi_dep_ot, delhi_arr_ot = calculate_punctuality(delhi_df)
-    
-    metrics = ['Departure\nOn-Time', 'Arrival\nOn-Time']
-    blore_values = [blore_dep_ot, blore_arr_ot]
-    delhi_values = [delhi_dep_ot, delhi_arr_ot]
-    
-    x = np.arange(len(metrics))
-    width = 0.35
-    
-    plt.bar(x - width/2, blore_values, width, label='Bangalore', alpha=0.8, color='#FF6B6B')
-    plt.bar(x + width/2, delhi_values, width, label='Delhi', alpha=0.8, color='#4ECDC4')
-    
+    metrics = data['metrics']
+    x, width, offsets = _grouped_bars(data, metrics)
+
     plt.ylabel('On-Time Performance (%)')
     plt.title('On-Time Performance (≤15 min delay)', fontsize=12, fontweight='bold')
     plt.xticks(x, metrics)
     plt.legend()
     plt.ylim(0, 100)
-    
+
     # Add percentage labels
-    for i, (b_val, d_val) in enumerate(zip(blore_values, delhi_values)):
-        plt.text(i - width/2, b_val + 1, f'{b_val:.1f}%', ha='center', fontweight='bold')
-        plt.text(i + width/2, d_val + 1, f'{d_val:.1f}%', ha='center', fontweight='bold')
-    
+    for offset, values in zip(offsets, data['values']):
+        for i, value in enumerate(values):
+            plt.text(i + offset, value + 1, f'{value:.1f}%', ha='center', fontweight='bold')
+
     plt.tight_layout()
-    plt.savefig('plots/08_ontime_performance_comparison.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    
-    # 9. Average Delay by Carrier (Top 5)
+
+
+def _plot_carrier_delays(data):
     plt.figure(figsize=(10, 6))
-    
-    def get_carrier_delays(df, top_n=5):
-        top_carriers = df['Carrier'].value_counts().head(top_n).index
-        carrier_delays = []
-        
-        for carrier in top_carriers:
-            carrier_data = df[df['Carrier'] == carrier]
-            all_delays = pd.concat([
-                carrier_data['Departure Delay (min)'].dropna(),
-                carrier_data['Arrival Delay (min)'].dropna()
-            ])
-            avg_delay = all_delays.mean() if len(all_delays) > 0 else 0
-            carrier_delays.append(avg_delay)
-        
-        return top_carriers, carrier_delays
-    
-    carriers, delays = get_carrier_delays(pd.concat([blore_df, delhi_df]), 6)
-    
+    carriers, delays = data['carriers'], data['delays']
     plt.barh(range(len(carriers)), delays, alpha=0.8, color='#45B7D1')
     plt.yticks(range(len(carriers)), carriers)
     plt.xlabel('Average Delay (minutes)')
     plt.title('Average Delay by Top Carriers', fontsize=12, fontweight='bold')
     plt.gca().invert_yaxis()
-    
+
     # Add delay values
     for i, delay in enumerate(delays):
         plt.text(delay + 0.2, i, f'{delay:.1f}', va='center', fontweight='bold')
-    
+
     plt.tight_layout()
-    plt.savefig('plots/09_average_delay_by_carrier.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    
-    # 10. Delay Heatmap by Hour and Airport
-    plt.figure(figsize=(12, 4))
-    
-    def create_delay_heatmap_data(df, airport_name):
-        hourly_delays = {}
-        for hour in range(24):
-            hour_data = []
-            for col in ['Scheduled Departure (Local)', 'Scheduled Arrival (Local)']:
-                time_col = df[col].dropna()
-                delay_col = 'Departure Delay (min)' if 'Departure' in col else 'Arrival Delay (min)'
-                
-                for idx, time_str in time_col.items():
-                    try:
-                        if pd.to_datetime(time_str).hour == hour:
-                            delay = df.loc[idx, delay_col]
-                            if pd.notna(delay):
-                                hour_data.append(delay)
-                    except:
-                        continue
-            
-            hourly_delays[hour] = np.mean(hour_data) if hour_data else 0
-        
-        return list(hourly_delays.values())
-    
-    blore_hourly_delays = create_delay_heatmap_data(blore_df, 'Bangalore')
-    delhi_hourly_delays = create_delay_heatmap_data(delhi_df, 'Delhi')
-    
-    heatmap_data = np.array([blore_hourly_delays, delhi_hourly_delays])
-    
-    sns.heatmap(heatmap_data, 
-                xticklabels=range(24), 
-                yticklabels=['Bangalore', 'Delhi'],
-                annot=False, 
-                cmap='RdYlBu_r', 
+
+
+def _plot_delay_heatmap(data):
+    plt.figure(figsize=(12, 2 + len(data['airports'])))
+    sns.heatmap(np.array(data['delays']),
+                xticklabels=data['hours'],
+                yticklabels=data['airports'],
+                annot=False,
+                cmap='RdYlBu_r',
                 center=0,
                 cbar_kws={'label': 'Average Delay (min)'})
     plt.title('Average Delay by Hour', fontsize=12, fontweight='bold')
     plt.xlabel('Hour of Day')
     plt.tight_layout()
-    plt.savefig('plots/10_delay_heatmap_by_hour.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    
-    # 11. Severe Delay Analysis
+
+
+def _plot_delay_severity(data):
     plt.figure(figsize=(12, 6))
-    
-    def severe_delay_analysis(df):
-        all_delays = pd.concat([
-            df['Departure Delay (min)'].dropna(),
-            df['Arrival Delay (min)'].dropna()
-        ])
-        
-        categories = ['On-Time\n(≤15 min)', 'Minor Delay\n(16-60 min)', 'Major Delay\n(61-120 min)', 'Severe Delay\n(>120 min)']
-        
-        on_time = (all_delays <= 15).sum()
-        minor = ((all_delays > 15) & (all_delays <= 60)).sum()
-        major = ((all_delays > 60) & (all_delays <= 120)).sum()
-        severe = (all_delays > 120).sum()
-        
-        return categories, [on_time, minor, major, severe]
-    
-    blore_cats, blore_severe = severe_delay_analysis(blore_df)
-    delhi_cats, delhi_severe = severe_delay_analysis(delhi_df)
-    
-    x = np.arange(len(blore_cats))
-    width = 0.35
-    
-    plt.bar(x - width/2, blore_severe, width, label='Bangalore', alpha=0.8, color='#FF6B6B')
-    plt.bar(x + width/2, delhi_severe, width, label='Delhi', alpha=0.8, color='#4ECDC4')
-    
+    x, _, _ = _grouped_bars(data, data['categories'])
     plt.xlabel('Delay Categories')
     plt.ylabel('Number of Flights')
     plt.title('Delay Severity Distribution', fontsize=12, fontweight='bold')
-    plt.xticks(x, blore_cats, rotation=45, ha='right')
+    plt.xticks(x, data['categories'], rotation=45, ha='right')
     plt.legend()
     plt.tight_layout()
-    plt.savefig('plots/11_delay_severity_distribution.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    
-    # 12. Daily Flight Volume Trend
+
+
+def _plot_daily_volume(data):
     plt.figure(figsize=(12, 6))
-    
-    def extract_date(time_str):
-        if pd.isna(time_str):
-            return None
-        try:
-            return pd.to_datetime(time_str).date()
-        except:
-            return None
-    
-    # Get dates from both airports
-    for df, name in [(blore_df, 'Bangalore'), (delhi_df, 'Delhi')]:
-        dates = []
-        for col in ['Scheduled Departure (Local)', 'Scheduled Arrival (Local)']:
-            dates.extend(df[col].dropna().apply(extract_date).dropna().tolist())
-        
-        date_counts = pd.Series(dates).value_counts().sort_index()
-        
-        plt.plot(range(len(date_counts)), date_counts.values, 
-                marker='o', label=name, linewidth=2, markersize=6)
-    
+    for name, color, trend in zip(data['airports'], data['colors'], data['values']):
+        flights = trend['flights']
+        plt.plot(range(len(flights)), flights,
+                marker='o', label=name, color=color, linewidth=2, markersize=6)
+
     plt.xlabel('Days')
     plt.ylabel('Number of Flights')
     plt.title('Daily Flight Volume Trend', fontsize=12, fontweight='bold')
     plt.legend()
     plt.grid(True, alpha=0.3)
     plt.tight_layout()
-    plt.savefig('plots/12_daily_flight_volume_trend.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    
+
+
+# Renderer per plot kind; per-airport plot names are '<nn>_<airport>_<kind>'
+RENDERERS = {
+    'flight_volume_comparison': _plot_flight_volume,
+    'flight_type_distribution': _plot_flight_types,
+    'delay_distribution_comparison': _plot_delay_distribution,
+    'top_airlines': _plot_top_airlines,
+    'hourly_traffic_pattern': _plot_hourly_traffic,
+    'ontime_performance_comparison': _plot_ontime_performance,
+    'average_delay_by_carrier': _plot_carrier_delays,
+    'delay_heatmap_by_hour': _plot_delay_heatmap,
+    'delay_severity_distribution': _plot_delay_severity,
+    'daily_flight_volume_trend': _plot_daily_volume
+}
+
+
+def _renderer(name):
+    return next(plot for kind, plot in RENDERERS.items() if name.endswith(kind))
+
+
+def render_plot(name, data, out_dir=None):
+    """Render one figure from its precomputed series and save it as PNG in out_dir (default PLOTS_DIR)"""
+    out_dir = out_dir or PLOTS_DIR
+    with stage(f'render_plot:{name}'):
+        _load_plotting()
+        os.makedirs(out_dir, exist_ok=True)
+        _renderer(name)(data)
+        filename = f'{name}.png'
+        plt.savefig(os.path.join(out_dir, filename), dpi=300, bbox_inches='tight')
+        plt.close()
+    return filename
+
+
+def render_plots(series, workers=None):
+    """Rasterize the figures in a process pool, one figure per task"""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(render_plot, series.keys(), series.values()))
+
+
+def create_individual_visualizations(frames, render=True, workers=None):
+    """
+    Create comprehensive visualizations and save each plot individually
+
+    The series behind every plot are always written to plots/data/ as JSON;
+    PNG rendering is optional and runs in a process pool.
+    """
+    series = chart_series(frames)
+    write_chart_data(series)
+    print(f"✅ Chart data written to {CHART_DATA_DIR}/")
+
+    if not render:
+        return series
+
+    filenames = render_plots(series, workers)
     print("✅ All individual plots saved successfully!")
     print("\n📁 Saved Files:")
-    for i, filename in enumerate([
-        "01_flight_volume_comparison.png",
-        "02_bangalore_flight_type_distribution.png", 
-        "03_delhi_flight_type_distribution.png",
-        "04_delay_distribution_comparison.png",
-        "05_bangalore_top_airlines.png",
-        "06_delhi_top_airlines.png", 
-        "07_hourly_traffic_pattern.png",
-        "08_ontime_performance_comparison.png",
-        "09_average_delay_by_carrier.png",
-        "10_delay_heatmap_by_hour.png",
-        "11_delay_severity_distribution.png",
-        "12_daily_flight_volume_trend.png"
-    ], 1):
-        print(f"   {i:2d}. plots/{filename}")
-
-
-# Load the data - Update these paths to match your file locations
-blore_df = pd.read_csv('data/blore_airport_data.csv')  # Adjust path as needed
-delhi_df = pd.read_csv('data/delhi_airport_data.csv')   # Adjust path as needed
-
-# Create individual visualizations
-create_individual_visualizations(blore_df, delhi_df)
-
-print(f"\n🎨 All plots saved individually in the 'plots/' folder!")
-print(f"📱 Perfect for frontend integration - each chart is a separate, optimized file!")
+    for i, filename in enumerate(filenames, 1):
+        print(f"   {i:2d}. {PLOTS_DIR}/{filename}")
+    return series
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Generate chart data and plots for the registered airports')
+    parser.add_argument('--data-only', action='store_true', help='write the chart series as JSON and skip PNG rendering')
+    parser.add_argument('--workers', type=int, default=None, help='processes used for PNG rendering')
+    parser.add_argument('--airports', nargs='+', default=None, help='IATA codes (default: every airport with data)')
+    args = parser.parse_args()
+
+    # Load the data - airports and paths come from the registry in airports.json
+    frames = load_airports(args.airports)
+
+    # Create individual visualizations
+    create_individual_visualizations(frames, render=not args.data_only, workers=args.workers)
+
+    if not args.data_only:
+        print(f"\n🎨 All plots saved individually in the 'plots/' folder!")
+        print(f"📱 Perfect for frontend integration - each chart is a separate, optimized file!")
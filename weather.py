@@ -0,0 +1,155 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from airports import REGISTRY, available_airports
+from loader import AIRPORT_FILES, load_airport, _read_cache, _write_cache
+from delay_model import demand_matrix, fit_delay_model
+
+WEATHER_CACHE_DIR = '.cache/weather'
+
+# Meteostat fields -> feature columns (daily files use tavg, hourly files temp)
+WEATHER_COLUMNS = {
+    'tavg': 'Temp (C)',
+    'temp': 'Temp (C)',
+    'prcp': 'Precip (mm)',
+    'wspd': 'Wind (km/h)',
+    'pres': 'Pressure (hPa)'
+}
+
+PRECIP_BINS = [-np.inf, 0.1, 2.5, 10, 50, np.inf]
+PRECIP_LABELS = ['Dry', 'Light', 'Moderate', 'Heavy', 'Very heavy']
+WIND_BINS = [-np.inf, 10, 20, 30, np.inf]
+WIND_LABELS = ['Calm (<10)', 'Breezy (10-20)', 'Windy (20-30)', 'Strong (>30)']
+
+
+def load_weather(airport, path=None):
+    """
+    Weather observations for one airport on a sorted, UTC DatetimeIndex.
+
+    Reads Meteostat-style JSON ({'data': [{'date' or 'time': ..., ...}]}),
+    daily or hourly; timestamps are local to the airport's registry timezone.
+    'Valid (min)' is how long each observation applies (the record spacing).
+    """
+    path = path or REGISTRY[airport]['weather']
+    with open(path, encoding='utf-8') as f:
+        records = pd.DataFrame(json.load(f)['data'])
+
+    time_col = 'time' if 'time' in records else 'date'
+    times = pd.to_datetime(records[time_col]).dt.tz_localize(REGISTRY[airport]['timezone'])
+    weather = records[[c for c in WEATHER_COLUMNS if c in records]].rename(columns=WEATHER_COLUMNS)
+    weather.index = pd.DatetimeIndex(times.dt.tz_convert('UTC'), name='Observed')
+    weather = weather.sort_index().astype(float)
+
+    spacing = weather.index.to_series().diff().median()
+    weather['Valid (min)'] = spacing / pd.Timedelta(minutes=1) if pd.notna(spacing) else 24 * 60
+    return weather
+
+
+def join_weather(df, weather):
+    """
+    As-of join the latest observation at or before each flight's scheduled time.
+
+    One sorted merge_asof over the whole frame; observations older than
+    their validity window are not used. Returns df with the weather columns
+    added, in df's original row order.
+    """
+    tolerance = pd.Timedelta(minutes=float(weather['Valid (min)'].iloc[0])) if len(weather) else None
+    flights = pd.DataFrame({
+        'row': np.arange(len(df)),
+        'at': df['Scheduled Time (Local)'].dt.tz_convert('UTC')
+    }).dropna(subset=['at'])
+    observations = weather.drop(columns='Valid (min)').reset_index().rename(columns={'Observed': 'at'})
+
+    joined = pd.merge_asof(flights.sort_values('at'), observations, on='at',
+                           direction='backward', tolerance=tolerance)
+    features = joined.set_index('row').drop(columns='at').reindex(np.arange(len(df)))
+    features.index = df.index
+    return pd.concat([df, features], axis=1)
+
+
+def _weather_cache_path(airport):
+    return os.path.join(WEATHER_CACHE_DIR, f'{airport}.parquet')
+
+
+def load_weather_features(airport, use_cache=True):
+    """
+    Flights joined with weather for one airport, cached as Parquet.
+
+    The cache is keyed on the mtimes of both the flight CSV and the weather
+    file, so a dashboard refresh reuses the join until either changes.
+    """
+    weather_path = REGISTRY[airport]['weather']
+    source_key = f'{os.stat(AIRPORT_FILES[airport]).st_mtime_ns}:{os.stat(weather_path).st_mtime_ns}'
+    cache_path = _weather_cache_path(airport)
+
+    joined = _read_cache(cache_path, source_key) if use_cache else None
+    if joined is None:
+        joined = join_weather(load_airport(airport, use_cache=use_cache), load_weather(airport, weather_path))
+        if use_cache:
+            _write_cache(joined, cache_path, source_key)
+    return joined
+
+
+def load_weather_combined(airports=None, use_cache=True):
+    """Weather-joined flights for every airport that has both flight and weather data"""
+    airports = airports or [a for a in available_airports() if REGISTRY[a].get('weather')]
+    frames = [load_weather_features(airport, use_cache) for airport in airports]
+    combined = pd.concat(frames, ignore_index=True)
+    for col in ['Airport', 'Carrier', 'Flight Type']:
+        combined[col] = combined[col].astype('category')
+    return combined
+
+
+def weather_breakdown(joined, column='Precip (mm)', bins=PRECIP_BINS, labels=PRECIP_LABELS):
+    """Delay statistics per airport and weather band (precipitation by default, or wind)"""
+    frame = joined[['Airport']].copy()
+    frame['Band'] = pd.cut(joined[column], bins, labels=labels)
+    frame['Delay'] = joined['Delay (min)']
+    frame['On_Time'] = (joined['Delay (min)'] <= 15).where(joined['Delay (min)'].notna()) * 100
+    frame['Days'] = joined['Date']
+
+    stats = frame.groupby(['Airport', 'Band'], observed=True).agg(
+        Flights=('Delay', 'size'),
+        Days=('Days', 'nunique'),
+        Mean_Delay=('Delay', 'mean'),
+        P90_Delay=('Delay', lambda d: d.quantile(0.9)),
+        On_Time_Rate=('On_Time', 'mean')
+    )
+    return stats.round(2)
+
+
+def delay_attribution(joined, model):
+    """
+    Split each day's predicted lateness into congestion and weather parts.
+
+    Congestion is the model's prediction from that day's demand alone; the
+    weather part is the model's precipitation term on that day.
+    """
+    counts, lateness, known, precip = demand_matrix(joined, model.airport, model.bucket_minutes, weather=True)
+    congestion = model.predict(counts)
+    with_weather = model.predict(counts, precip)
+    days = np.unique(joined.loc[joined['Airport'] == model.airport, 'Date'].dropna())
+
+    def per_day(values, weights):
+        return (values * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1)
+
+    return pd.DataFrame({
+        'Precip (mm)': precip.max(axis=1),
+        'Observed': per_day(lateness, known),
+        'Congestion': per_day(congestion, counts),
+        'Weather': per_day(with_weather - congestion, counts)
+    }, index=pd.Index(days, name='Date')).round(2)
+
+
+if __name__ == "__main__":
+    joined = load_weather_combined()
+    print("🌧️ DELAY BY PRECIPITATION:")
+    print(weather_breakdown(joined))
+    print("\n💨 DELAY BY WIND:")
+    print(weather_breakdown(joined, 'Wind (km/h)', WIND_BINS, WIND_LABELS))
+
+    for airport in joined['Airport'].cat.categories:
+        model = fit_delay_model(joined, airport)
+        print(f"\n✈️ {airport}: {model.weather_coef:.2f} min per mm of rain")
+        print(delay_attribution(joined, model))